@@ -1,3 +1,14 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import APIToken
+
+@admin.register(APIToken)
+class APITokenAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'user', 'name', 'created_at', 'expires_at')
+    search_fields = ('prefix', 'user__username', 'name')
+    raw_id_fields = ('user',)
+    # Tokens are issued through /api-token-auth/, the hash is never edited by hand
+    readonly_fields = ('prefix', 'digest', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
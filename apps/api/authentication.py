@@ -0,0 +1,193 @@
+import copy
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import APIToken
+
+class TokenCache:
+    """
+    Bounded, thread-safe LRU cache with a TTL, mapping a token key to a snapshot of its
+    (user, token) pair. Lookups and hit / miss latencies are counted for monitoring.
+
+    The cache lives in each process. Changes made in this process invalidate it right
+    away through signals; other processes see them after at most TOKEN_CACHE_TTL seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'hit_seconds': 0.0, 'miss_seconds': 0.0}
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'TOKEN_CACHE_MAX_SIZE', 10000)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'TOKEN_CACHE_TTL', 60)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, token, expires_at = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+
+        # Every request gets its own copies, views may modify request.user
+        user = copy.copy(user)
+        token = copy.copy(token)
+        token.user = user
+        return user, token
+
+    def set(self, key, user, token, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (user, token, expires_at)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_user(self, user_pk):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_pk, ())):
+                self._remove(key)
+
+    def record(self, hit, seconds):
+        with self._lock:
+            if hit:
+                self._stats['hits'] += 1
+                self._stats['hit_seconds'] += seconds
+            else:
+                self._stats['misses'] += 1
+                self._stats['miss_seconds'] += seconds
+
+    def stats(self):
+        """
+        Counters since the process started, for monitoring.
+        """
+        with self._lock:
+            hits, misses = self._stats['hits'], self._stats['misses']
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': hits,
+                'misses': misses,
+                'evictions': self._stats['evictions'],
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                'avg_hit_ms': self._stats['hit_seconds'] * 1000 / hits if hits else 0.0,
+                'avg_miss_ms': self._stats['miss_seconds'] * 1000 / misses if misses else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[0].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[0].pk]
+
+token_cache = TokenCache()
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that skips the Token JOIN User query for recently seen tokens.
+    Only active users are cached, a cached entry is dropped as soon as its token is
+    deleted or its user is saved (e.g. deactivated) or deleted.
+    """
+
+    def authenticate_credentials(self, key):
+        start = time.perf_counter()
+        cached = token_cache.get(key)
+        if cached is not None:
+            token_cache.record(True, time.perf_counter() - start)
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        token_cache.record(False, time.perf_counter() - start)
+        return user, token
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    Authentication with the expiring tokens of APIToken:
+
+        Authorization: Bearer <prefix>.<secret>
+
+    The prefix finds the row through its unique index, then the secret is checked
+    against the stored hash. Results are cached like CachedTokenAuthentication, never
+    longer than the token still has to live.
+    """
+    keyword = 'Bearer'
+    model = APIToken
+
+    def authenticate_credentials(self, key):
+        start = time.perf_counter()
+        prefix, _, secret = key.partition('.')
+        if not prefix or not secret:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        # Keyed by the hash, so no usable token is kept in memory
+        digest = APIToken.hash_secret(secret)
+        cache_key = f'bearer:{digest}'
+        cached = token_cache.get(cache_key)
+        if cached is not None:
+            token_cache.record(True, time.perf_counter() - start)
+            return cached
+
+        try:
+            token = APIToken.objects.select_related('user').get(prefix=prefix)
+        except APIToken.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        if not hmac.compare_digest(token.digest, digest):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        lifetime = (token.expires_at - timezone.now()).total_seconds()
+        if lifetime <= 0:
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        token_cache.set(cache_key, token.user, token, ttl=min(token_cache.ttl, lifetime))
+        token_cache.record(False, time.perf_counter() - start)
+        return token.user, token
+
+@receiver(post_delete, sender=APIToken)
+def invalidate_deleted_api_token(sender, instance, **kwargs):
+    token_cache.invalidate(f'bearer:{instance.digest}')
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
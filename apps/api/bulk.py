@@ -0,0 +1,164 @@
+"""
+Bulk create / update / delete of users, used by the /api/users/bulk/ endpoint.
+
+Items are processed in chunks of BULK_USERS_CHUNK_SIZE: each chunk is validated, checked
+for uniqueness with one query per unique field, has its passwords hashed in the worker
+pool, and is written with a single bulk_create / bulk_update / delete. Every function
+returns (results, errors) where each error is {'index': <position in the request>, 'errors': {...}}.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from users.cache import bump_profile_version
+from users.models import User
+from users.security.hashing import hash_passwords
+from .authentication import token_cache
+from .serializers import BulkUserCreateSerializer, BulkUserUpdateSerializer
+
+def chunked(items):
+    size = getattr(settings, 'BULK_USERS_CHUNK_SIZE', 1000)
+    for offset in range(0, len(items), size):
+        yield offset, items[offset:offset + size]
+
+def reject_duplicates(valid, errors, fields):
+    """
+    Drop the items whose unique fields repeat inside the request or belong to another
+    user in the database. `valid` is a list of (index, pk or None, data) tuples.
+    """
+    taken = {}
+    for field in fields:
+        values = [data[field] for _, _, data in valid if field in data]
+        taken[field] = dict(User.objects.filter(**{f'{field}__in': values}).values_list(field, 'pk'))
+
+    kept = []
+    seen = {field: set() for field in fields}
+    for index, pk, data in valid:
+        item_errors = {}
+        for field in fields:
+            if field not in data:
+                continue
+            value = data[field]
+            if value in seen[field]:
+                item_errors[field] = [f'Duplicate {field} in this request.']
+            elif taken[field].get(value, pk) != pk:
+                item_errors[field] = [f'A user with that {field} already exists.']
+            seen[field].add(value)
+        if item_errors:
+            errors.append({'index': index, 'errors': item_errors})
+        else:
+            kept.append((index, pk, data))
+    return kept
+
+def is_pk(value):
+    # bool is an int too, but {"id": true} is not a user id
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def invalid_id(index, errors):
+    errors.append({'index': index, 'errors': {'id': ['A valid integer is required.']}})
+
+def chunk_failed(valid, errors, exc):
+    for index, _, _ in valid:
+        errors.append({'index': index, 'errors': {'non_field_errors': [str(exc)]}})
+
+def bulk_create_users(items):
+    results, errors = [], []
+    for offset, chunk in chunked(items):
+        valid = []
+        for index, item in enumerate(chunk, start=offset):
+            serializer = BulkUserCreateSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, None, dict(serializer.validated_data)))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        valid = reject_duplicates(valid, errors, ['username', 'email'])
+        if not valid:
+            continue
+
+        # PBKDF2 runs in parallel in the worker processes
+        hashes = hash_passwords(data.pop('password') for _, _, data in valid)
+        users = [User(password=encoded, **data) for (_, _, data), encoded in zip(valid, hashes)]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+        except IntegrityError as exc:
+            chunk_failed(valid, errors, exc)
+            continue
+
+        # id is None on databases that can't return ids from a bulk insert (MySQL)
+        results.extend(
+            {'index': index, 'id': user.pk, 'username': user.username}
+            for (index, _, _), user in zip(valid, users)
+        )
+    return results, errors
+
+def bulk_update_users(items):
+    results, errors = [], []
+    for offset, chunk in chunked(items):
+        ids = [item.get('id') for item in chunk if isinstance(item, dict)]
+        users = User.objects.in_bulk([pk for pk in ids if is_pk(pk)])
+
+        valid = []
+        for index, item in enumerate(chunk, start=offset):
+            pk = item.get('id') if isinstance(item, dict) else None
+            if not is_pk(pk):
+                invalid_id(index, errors)
+                continue
+            user = users.get(pk)
+            if user is None:
+                errors.append({'index': index, 'errors': {'id': ['User not found.']}})
+                continue
+            serializer = BulkUserUpdateSerializer(user, data=item, partial=True)
+            if serializer.is_valid():
+                data = dict(serializer.validated_data)
+                data.pop('id')
+                valid.append((index, user.pk, data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        valid = reject_duplicates(valid, errors, ['username'])
+        if not valid:
+            continue
+
+        now = timezone.now()
+        fields = {'updated_at'}
+        changed = []
+        for _, pk, data in valid:
+            user = users[pk]
+            for field, value in data.items():
+                setattr(user, field, value)
+            fields.update(data)
+            # bulk_update doesn't run auto_now
+            user.updated_at = now
+            changed.append(user)
+        try:
+            with transaction.atomic():
+                User.objects.bulk_update(changed, sorted(fields))
+        except IntegrityError as exc:
+            chunk_failed(valid, errors, exc)
+            continue
+
+        # bulk_update doesn't send post_save, drop the cached tokens and profiles of these users by hand
+        for _, pk, _ in valid:
+            token_cache.invalidate_user(pk)
+        bump_profile_version(*(name for user in changed for name in (user.username, user._loaded_username)))
+        results.extend({'index': index, 'id': pk} for index, pk, _ in valid)
+    return results, errors
+
+def bulk_delete_users(ids):
+    results, errors = [], []
+    for offset, chunk in chunked(ids):
+        existing = set(
+            User.objects.filter(pk__in=[pk for pk in chunk if is_pk(pk)]).values_list('pk', flat=True)
+        )
+        for index, pk in enumerate(chunk, start=offset):
+            if not is_pk(pk):
+                invalid_id(index, errors)
+            elif pk in existing:
+                results.append({'index': index, 'id': pk})
+            else:
+                errors.append({'index': index, 'errors': {'id': ['User not found.']}})
+        # Deleting through the queryset still sends post_delete, which cleans up profile images
+        User.objects.filter(pk__in=existing).delete()
+    return results, errors
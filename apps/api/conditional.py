@@ -0,0 +1,34 @@
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+def user_etag(user):
+    """
+    Strong ETag derived from the user's version (pk + updated_at), no serialization needed.
+    The representation also depends on the URL (?fields=...), which caches already key on.
+    """
+    return quote_etag(f'{user.pk}-{int(user.updated_at.timestamp() * 1000000)}')
+
+def user_last_modified(user):
+    return int(user.updated_at.timestamp())
+
+def conditional_response(request, user):
+    """
+    Evaluate If-None-Match / If-Modified-Since (GET) and If-Match / If-Unmodified-Since
+    (PUT, PATCH) against the user's current version.
+
+    Returns a 304 or 412 response when the request can be answered without running
+    the serializer, None otherwise.
+    """
+    return get_conditional_response(
+        request,
+        etag=user_etag(user),
+        last_modified=user_last_modified(user),
+    )
+
+def set_validators(response, user):
+    """
+    Add the ETag and Last-Modified headers of the user to the response.
+    """
+    response['ETag'] = user_etag(user)
+    response['Last-Modified'] = http_date(user_last_modified(user))
+    return response
@@ -0,0 +1,29 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api.export import EXPORT_FORMATS, iter_export
+
+class Command(BaseCommand):
+    help = 'Stream every user as NDJSON or CSV, with constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=sorted(EXPORT_FORMATS), default='ndjson',
+                            help='Output format (default: ndjson).')
+        parser.add_argument('--output', default='-',
+                            help='File to write to, - for stdout (default).')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Users read per query (default: EXPORT_USERS_CHUNK_SIZE).')
+
+    def handle(self, *args, **options):
+        if options['output'] == '-':
+            output = sys.stdout
+        else:
+            output = open(options['output'], 'w', newline='', encoding='utf-8')
+
+        try:
+            for line in iter_export(options['type'], chunk_size=options['chunk_size']):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
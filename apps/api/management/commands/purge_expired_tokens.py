@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import APIToken
+
+class Command(BaseCommand):
+    help = 'Delete expired API tokens in chunks, walking the expires_at index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Tokens deleted per query (default: 1000).')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = APIToken.objects.filter(expires_at__lte=now).order_by('expires_at')
+        deleted = 0
+        while True:
+            # Short transactions: never lock the whole table while sweeping
+            ids = list(expired.values_list('pk', flat=True)[:options['chunk_size']])
+            if not ids:
+                break
+            deleted += APIToken.objects.filter(pk__in=ids).delete()[1].get(APIToken._meta.label, 0)
+        self.stdout.write(f'Deleted {deleted} expired token(s).')
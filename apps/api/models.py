@@ -1,3 +1,66 @@
-from django.db import models
+import hashlib
+import secrets
+from datetime import timedelta
 
-# Create your models here.
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+class APIToken(models.Model):
+    """
+    Expiring API token. A user can hold several of them.
+
+    The token given to the client is "<prefix>.<secret>". Only the prefix (unique, so
+    indexed) and the SHA-256 of the secret are stored: a lookup is a single index probe
+    whatever the number of tokens, and a database leak does not leak usable tokens.
+    """
+    PREFIX_BYTES = 4  # 8 hex characters
+    # Prefixes drawn before giving up, collisions are rare below millions of tokens
+    ISSUE_ATTEMPTS = 5
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, blank=True)
+    prefix = models.CharField(max_length=PREFIX_BYTES * 2, unique=True)
+    digest = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Indexed for the purge_expired_tokens sweeper
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'{self.prefix}... ({self.user})'
+
+    @staticmethod
+    def hash_secret(secret):
+        return hashlib.sha256(secret.encode()).hexdigest()
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    @classmethod
+    def issue(cls, user, name='', lifetime=None):
+        """
+        Create a token for the user and return (token, plaintext). The plaintext is not
+        stored anywhere and can only be shown to the client once.
+        """
+        if lifetime is None:
+            lifetime = timedelta(seconds=getattr(settings, 'API_TOKEN_LIFETIME', 30 * 24 * 3600))
+        secret = secrets.token_urlsafe(32)
+        for attempt in range(cls.ISSUE_ATTEMPTS):
+            prefix = secrets.token_hex(cls.PREFIX_BYTES)
+            try:
+                with transaction.atomic():
+                    token = cls.objects.create(
+                        user=user,
+                        name=name,
+                        prefix=prefix,
+                        digest=cls.hash_secret(secret),
+                        expires_at=timezone.now() + lifetime,
+                    )
+            except IntegrityError:
+                # Only a prefix collision is worth another draw, any other error (e.g. a
+                # deleted user) would fail again
+                if attempt + 1 == cls.ISSUE_ATTEMPTS or not cls.objects.filter(prefix=prefix).exists():
+                    raise
+                continue
+            return token, f'{prefix}.{secret}'
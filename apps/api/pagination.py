@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+class UserKeysetPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination for the users list.
+
+    Pages are fetched with WHERE date_joined > <last seen> ORDER BY date_joined, id,
+    backed by the (date_joined, id) index, so deep pages cost the same as the first one
+    and no COUNT(*) query is issued.
+
+    Usage: /api/users/?pagination=keyset, then follow the `next` / `previous` links.
+    """
+    ordering = ('date_joined', 'id')
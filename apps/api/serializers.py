@@ -1,6 +1,89 @@
+from operator import attrgetter
+
+from django.db import models
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 from users.models import User
-from PIL import Image
+from users.images.thumbnails import THUMBNAIL_SIZES
+from users.images.validators import validate_profile_image
+from users.security.hashing import hash_password
+
+def serializer_columns(serializer):
+    """
+    Model columns needed to render the readable fields of a ModelSerializer, to be passed
+    to QuerySet.only(). Non-model fields declare theirs in `column_dependencies`.
+    """
+    opts = serializer.Meta.model._meta
+    model_fields = {field.name for field in opts.concrete_fields}
+    dependencies = getattr(serializer, 'column_dependencies', {})
+
+    columns = {opts.pk.name}
+    for field in serializer._readable_fields:
+        if field.field_name in dependencies:
+            columns.update(dependencies[field.field_name])
+        elif field.source_attrs and field.source_attrs[0] in model_fields:
+            columns.add(field.source_attrs[0])
+    return columns
+
+class SparseFieldsMixin:
+    """
+    Lets the caller narrow a serializer with `fields=[...]` and/or `exclude=[...]` keyword
+    arguments. Unknown names are ignored.
+    """
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+        for field_name in exclude or []:
+            self.fields.pop(field_name, None)
+
+class ReadOnlyListSerializer(serializers.ListSerializer):
+    """
+    List serializer for read-only output that resolves the child's fields once per list
+    instead of once per row, and reads plain attributes with a precompiled attrgetter.
+
+    Produces the same dicts as the default ListSerializer.
+    """
+
+    def compile_fields(self):
+        compiled = []
+        for field in self.child._readable_fields:
+            if field.source == '*':
+                # SerializerMethodField and friends receive the whole instance
+                getter = None
+            elif len(field.source_attrs) == 1:
+                getter = attrgetter(field.source_attrs[0])
+            else:
+                getter = field.get_attribute
+            compiled.append((field.field_name, getter, field))
+        return compiled
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        fields = self.compile_fields()
+
+        rows = []
+        for instance in iterable:
+            row = {}
+            for field_name, getter, field in fields:
+                if getter is None:
+                    attribute = instance
+                else:
+                    try:
+                        attribute = getter(instance)
+                    except SkipField:
+                        continue
+                    except AttributeError:
+                        # Let DRF build its usual error message
+                        attribute = field.get_attribute(instance)
+
+                check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+                row[field_name] = None if check_for_none is None else field.to_representation(attribute)
+            rows.append(row)
+        return rows
 
 class UserCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,27 +92,20 @@ class UserCreateSerializer(serializers.ModelSerializer):
         extra_kwargs = {'password': {'write_only': True}}
 
     def create(self, validated_data):
-        return User.objects.create_user(**validated_data)
+        # Same as create_user(), with the password hashed in the worker pool
+        password = validated_data.pop('password')
+        validated_data['email'] = User.objects.normalize_email(validated_data.get('email'))
+        user = User(**validated_data)
+        user.username = user.normalize_username(user.username)
+        user.password = hash_password(password)
+        user.save()
+        return user
     
     def validate_profile_image(self, value):
-        # 1. Validate file size
-        max_size = 2 * 1024 * 1024  # 2 MB
-        if value.size > max_size:
-            raise serializers.ValidationError("Profile image file size should not exceed 2MB.")
-        
-        # 2. Validate image dimensions using PIL
-        try:
-            img = Image.open(value)
-            max_width = 1024
-            max_height = 1024
-            if img.width > max_width or img.height > max_height:
-                raise serializers.ValidationError("Profile image dimensions should not exceed 1024x1024 pixels.")
-        except Exception as e:
-            raise serializers.ValidationError("Invalid image file.")
-        
-        return value
+        # Validate file size and image dimensions
+        return validate_profile_image(value)
     
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['username', 'first_name', 'last_name', 'profile_image']
@@ -40,31 +116,75 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         instance.last_name = validated_data.get('last_name', instance.last_name)
         if 'profile_image' in validated_data:
             instance.profile_image = validated_data.get('profile_image')
-        instance.save()
+        # Only the editable columns: the instance may be a cached copy of the user (token
+        # authentication), saving all of it would undo changes made since it was loaded
+        instance.save(update_fields=[*self.Meta.fields, 'updated_at'])
         return instance
     
     def validate_profile_image(self, value):
-        # 1. Validate file size
-        max_size = 2 * 1024 * 1024  # 2 MB
-        if value.size > max_size:
-            raise serializers.ValidationError("Profile image file size should not exceed 2MB.")
-        
-        # 2. Validate image dimensions
-        try:
-            img = Image.open(value)
-            max_width = 1024
-            max_height = 1024
-            if img.width > max_width or img.height > max_height:
-                raise serializers.ValidationError("Profile image dimensions should not exceed 1024x1024 pixels.")
-        except Exception as e:
-            raise serializers.ValidationError("Invalid image file.")
-        
-        return value
-
-class UserSerializer(serializers.ModelSerializer):
+        # Validate file size and image dimensions
+        return validate_profile_image(value)
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    profile_image_thumbnails = serializers.SerializerMethodField()
+
+    # Model columns read by fields that are not plain model fields
+    column_dependencies = {'profile_image_thumbnails': ['profile_image']}
+
     class Meta:
         model = User
-        fields = ['id', 'username','first_name', 'last_name', 'email', 'is_active', 'date_joined', 'profile_image']
+        fields = ['id', 'username','first_name', 'last_name', 'email', 'is_active', 'date_joined', 'profile_image', 'profile_image_thumbnails']
+        list_serializer_class = ReadOnlyListSerializer
         extra_kwargs = {
             'password': {'write_only': True}
-        }
\ No newline at end of file
+        }
+
+    def get_profile_image_thumbnails(self, obj):
+        """
+        Absolute URLs of the profile image thumbnails, keyed by name (profile, nav).
+        The context may set generate_thumbnails=False to skip the storage checks (export).
+        """
+        if not obj.profile_image:
+            return None
+        request = self.context.get('request')
+        generate = self.context.get('generate_thumbnails', True)
+        thumbnails = {}
+        for size_name in THUMBNAIL_SIZES:
+            url = obj.profile_image_thumbnail_url(size_name, generate)
+            thumbnails[size_name] = request.build_absolute_uri(url) if request else url
+        return thumbnails
+
+class BulkUserCreateSerializer(UserCreateSerializer):
+    """
+    UserCreateSerializer for bulk imports: no profile image, and no per-row unique
+    username / email queries, uniqueness is checked once per batch in api/bulk.py.
+    """
+    class Meta(UserCreateSerializer.Meta):
+        fields = ['username', 'email', 'password', 'first_name', 'last_name']
+        extra_kwargs = {
+            'password': {'write_only': True},
+            'username': {'validators': [User.username_validator]},
+            'email': {'validators': []},
+        }
+
+    def validate_username(self, value):
+        return User.normalize_username(value)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+class BulkUserUpdateSerializer(serializers.ModelSerializer):
+    """
+    Partial update of one user in a bulk request, identified by its id.
+    """
+    id = serializers.IntegerField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
+        extra_kwargs = {
+            'username': {'validators': [User.username_validator]},
+        }
+
+    def validate_username(self, value):
+        return User.normalize_username(value)
@@ -1,3 +1,364 @@
-from django.test import TestCase
+import json
+import secrets
+import shutil
+import time
+import warnings
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import AsyncClient, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from users.images.thumbnails import thumbnail_names
+
+from .authentication import token_cache
+from .conditional import user_etag
+from .models import APIToken
+from .serializers import UserUpdateSerializer
+
+User = get_user_model()
+
+class APITestMixin:
+    def setUp(self):
+        token_cache.clear()
+        for cache in caches.all():
+            cache.clear()
+
+class MeCachedUserTests(APITestMixin, APITestCase):
+    """
+    /api/users/me/ with a token whose user is served from the token cache.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'secret-pw-1')
+        _, key = APIToken.issue(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {key}')
+        # Loads the user into the token cache
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+
+    def test_patch_does_not_save_back_the_cached_user(self):
+        # Changed by another process: no signal reaches this process' token cache
+        User.objects.filter(pk=self.user.pk).update(is_verified=True)
+
+        response = self.client.patch('/api/users/me/', {'first_name': 'Alice'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.first_name, 'Alice')
+        self.assertTrue(user.is_verified)
+
+    def test_patch_of_a_user_deactivated_elsewhere_is_rejected(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response = self.client.patch('/api/users/me/', {'first_name': 'Alice'}, format='json')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(User.objects.get(pk=self.user.pk).first_name, '')
+        # The stale cached user is dropped, reads are refused too
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_patch_keeps_a_password_changed_elsewhere(self):
+        User.objects.filter(pk=self.user.pk).update(password='changed')
+
+        self.client.patch('/api/users/me/', {'last_name': 'Smith'}, format='json')
+
+        self.assertEqual(User.objects.get(pk=self.user.pk).password, 'changed')
+
+class ConditionalRequestTests(APITestMixin, APITestCase):
+    """
+    ETag / Last-Modified validators of /api/users/me/ and /api/users/<id>/.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'secret-pw-1')
+        self.client.force_authenticate(self.user)
+
+    def test_me_sends_validators(self):
+        response = self.client.get('/api/users/me/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], user_etag(self.user))
+        self.assertIn('Last-Modified', response)
+
+    def test_unchanged_me_is_not_modified(self):
+        etag = self.client.get('/api/users/me/')['ETag']
+
+        with mock.patch.object(UserUpdateSerializer, 'to_representation') as to_representation:
+            response = self.client.get('/api/users/me/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        to_representation.assert_not_called()
+
+    def test_changed_me_is_sent_again(self):
+        etag = self.client.get('/api/users/me/')['ETag']
+        self.user.first_name = 'Alice'
+        self.user.save()
+
+        response = self.client.get('/api/users/me/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_write_with_a_stale_if_match_is_refused(self):
+        etag = self.client.get('/api/users/me/')['ETag']
+        User.objects.filter(pk=self.user.pk).update(first_name='Other', updated_at=timezone.now())
+
+        for method in [self.client.patch, self.client.put]:
+            response = method('/api/users/me/', {'username': 'alice', 'first_name': 'Alice'},
+                              format='json', HTTP_IF_MATCH=etag)
+            self.assertEqual(response.status_code, 412)
+        self.assertEqual(User.objects.get(pk=self.user.pk).first_name, 'Other')
+
+    def test_write_with_the_current_if_match_succeeds(self):
+        etag = self.client.get('/api/users/me/')['ETag']
+
+        response = self.client.patch('/api/users/me/', {'first_name': 'Alice'}, format='json', HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], user_etag(User.objects.get(pk=self.user.pk)))
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unchanged_detail_is_not_modified(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'secret-pw-1', is_staff=True)
+        self.client.force_authenticate(admin)
+        url = f'/api/users/{self.user.pk}/'
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=self.client.get(url)['ETag'])
+
+        self.assertEqual(response.status_code, 304)
+
+class APITokenExpiryTests(APITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'secret-pw-1')
+
+    def get_me(self, key):
+        return self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {key}')
+
+    def test_only_the_digest_is_stored(self):
+        token, key = APIToken.issue(self.user)
+
+        prefix, secret = key.split('.')
+        self.assertEqual(token.prefix, prefix)
+        self.assertEqual(token.digest, APIToken.hash_secret(secret))
+        self.assertNotIn(secret, str(APIToken.objects.filter(pk=token.pk).values().get()))
+
+    def test_expired_token_is_refused(self):
+        _, key = APIToken.issue(self.user, lifetime=timedelta(seconds=-1))
+
+        response = self.get_me(key)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(str(response.data['detail']), 'Token has expired.')
+
+    def test_cached_token_expires_on_time(self):
+        # Shorter than TOKEN_CACHE_TTL: the cached entry must not outlive the token
+        _, key = APIToken.issue(self.user, lifetime=timedelta(seconds=30))
+        self.assertEqual(self.get_me(key).status_code, 200)
+
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 31), \
+                mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=31)):
+            self.assertEqual(self.get_me(key).status_code, 401)
+
+    def test_wrong_secret_is_refused(self):
+        _, key = APIToken.issue(self.user)
+
+        self.assertEqual(self.get_me(key.split('.')[0] + '.wrong').status_code, 401)
+
+    def test_purge_deletes_expired_tokens_only(self):
+        for _ in range(5):
+            APIToken.issue(self.user, lifetime=timedelta(seconds=-1))
+        kept, _ = APIToken.issue(self.user)
+        output = StringIO()
+
+        call_command('purge_expired_tokens', chunk_size=2, stdout=output)
+
+        self.assertEqual(list(APIToken.objects.all()), [kept])
+        self.assertIn('Deleted 5 expired token(s).', output.getvalue())
+
+class SparseFieldsetTests(APITestMixin, APITestCase):
+    """
+    ?fields= / ?exclude= narrow the serializer and the columns read.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'secret-pw-1', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def get_selecting(self, url):
+        """
+        GET url, returning the response and the SQL of the queries on the users table.
+        """
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = self.client.get(url)
+        return response, [sql for sql in queries if 'FROM "users_user"' in sql]
+
+    def test_list_fields(self):
+        response, queries = self.get_selecting('/api/users/?fields=id,username,unknown')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['results'][0]), ['id', 'username'])
+        select = queries[-1].split(' FROM ')[0]
+        self.assertIn('"username"', select)
+        self.assertNotIn('"email"', select)
+        self.assertNotIn('"password"', select)
+
+    def test_detail_exclude(self):
+        response, queries = self.get_selecting(f'/api/users/{self.admin.pk}/?exclude=username,profile_image')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'first_name', 'last_name'})
+        select = queries[-1].split(' FROM ')[0]
+        self.assertNotIn('"username"', select)
+        self.assertNotIn('"profile_image"', select)
+
+    def test_me_fields(self):
+        response = self.client.get('/api/users/me/?fields=username')
+
+        self.assertEqual(response.data, {'username': 'admin'})
+
+    def test_writes_are_not_narrowed(self):
+        response = self.client.patch('/api/users/me/?fields=username', {'first_name': 'Ada'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['first_name'], 'Ada')
+        self.assertEqual(User.objects.get(pk=self.admin.pk).first_name, 'Ada')
+
+class APITokenIssueTests(APITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'secret-pw-1')
+        self.taken, _ = APIToken.issue(self.user)
+
+    def test_prefix_collision_draws_another_prefix(self):
+        with mock.patch('secrets.token_hex', side_effect=[self.taken.prefix, 'f' * 8]):
+            token, key = APIToken.issue(self.user)
+
+        self.assertEqual(token.prefix, 'f' * 8)
+        self.assertTrue(key.startswith('ffffffff.'))
+
+    def test_gives_up_after_max_attempts(self):
+        with mock.patch('secrets.token_hex', return_value=self.taken.prefix) as token_hex:
+            with self.assertRaises(IntegrityError):
+                APIToken.issue(self.user)
+
+        self.assertEqual(token_hex.call_count, APIToken.ISSUE_ATTEMPTS)
+
+    def test_other_integrity_errors_are_not_retried(self):
+        error = IntegrityError('FOREIGN KEY constraint failed')
+
+        with mock.patch('secrets.token_hex', wraps=secrets.token_hex) as token_hex, \
+                mock.patch.object(APIToken.objects, 'create', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                APIToken.issue(self.user)
+
+        self.assertEqual(token_hex.call_count, 1)
+
+class BulkUsersTests(APITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'secret-pw-1', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def test_create_hashes_passwords_inline_without_workers(self):
+        # The test profile sets PASSWORD_HASHING_WORKERS = 0
+        items = [
+            {'username': f'bulk{i}', 'email': f'bulk{i}@example.com', 'password': 'secret-pw-1'}
+            for i in range(3)
+        ]
+
+        response = self.client.post('/api/users/bulk/', items, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(User.objects.get(username='bulk2').check_password('secret-pw-1'))
+
+    def test_update_reports_invalid_ids_per_item(self):
+        user = User.objects.create_user('bob', 'bob@example.com', 'secret-pw-1')
+        items = [{'id': [user.pk], 'first_name': 'X'}, {'id': user.pk, 'first_name': 'Bob'}, {'id': True}]
+
+        response = self.client.patch('/api/users/bulk/', items, format='json')
+
+        self.assertEqual(response.status_code, 207, response.data)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 2])
+        self.assertIn('id', response.data['errors'][0]['errors'])
+        self.assertEqual(User.objects.get(pk=user.pk).first_name, 'Bob')
+
+    def test_delete_reports_invalid_ids_per_item(self):
+        user = User.objects.create_user('bob', 'bob@example.com', 'secret-pw-1')
+
+        response = self.client.delete('/api/users/bulk/', [user.pk, [self.admin.pk], {'id': 1}], format='json')
+
+        self.assertEqual(response.status_code, 207, response.data)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        self.assertTrue(User.objects.filter(pk=self.admin.pk).exists())
+
+@override_settings(EXPORT_USERS_CHUNK_SIZE=2)
+class ExportTests(APITestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'secret-pw-1', is_staff=True)
+        for i in range(4):
+            User.objects.create_user(f'user{i}', f'user{i}@example.com', 'secret-pw-1')
+        _, self.key = APIToken.issue(self.admin)
+
+    def test_export_streams_ndjson(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.key}')
+
+        response = self.client.get('/api/users/export/')
+
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['username'] for row in rows], ['admin', 'user0', 'user1', 'user2', 'user3'])
+
+    def test_export_does_not_check_or_generate_thumbnails(self):
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT, ignore_errors=True)
+        buffer = BytesIO()
+        Image.new('RGB', (200, 200), 'red').save(buffer, 'PNG')
+        user = User.objects.get(username='user0')
+        user.profile_image = SimpleUploadedFile('photo.png', buffer.getvalue(), content_type='image/png')
+        user.save()
+        storage = user.profile_image.storage
+        for name in thumbnail_names(user.profile_image.name):
+            storage.delete(name)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.key}')
+
+        with mock.patch.object(type(storage), 'exists', wraps=storage.exists) as exists:
+            response = self.client.get('/api/users/export/')
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        self.assertEqual(exists.call_count, 0)
+        self.assertIn('/thumbs/', rows[1]['profile_image_thumbnails']['nav'])
+        self.assertFalse(any(storage.exists(name) for name in thumbnail_names(user.profile_image.name)))
+
+    async def test_export_streams_an_async_iterator_under_asgi(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            response = await AsyncClient().get(
+                '/api/users/export/?type=csv', headers={'Authorization': f'Bearer {self.key}'}
+            )
+            content = b''.join([chunk async for chunk in response.streaming_content])
+
+        self.assertTrue(response.is_async)
+        lines = content.decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['id', 'username'])
+        self.assertEqual(len(lines), 6)
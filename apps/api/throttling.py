@@ -0,0 +1,44 @@
+from django.utils.functional import cached_property
+from rest_framework.throttling import ScopedRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+from users.security.ratelimit import RateLimit, get_cache, parse_rate
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle keeps the timestamp of every request in the window, so each key
+    costs O(rate) memory and a full list rewrite per request. This one uses the two
+    counters of users.security.ratelimit.RateLimit instead.
+    """
+
+    @cached_property
+    def cache(self):
+        return get_cache()
+
+    def parse_rate(self, rate):
+        if rate is None:
+            return (None, None)
+        return parse_rate(rate)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self.retry_after = RateLimit(f'throttle-{self.scope}', self.rate).hit(self.key)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+class SlidingWindowUserThrottle(UserRateThrottle, SlidingWindowRateThrottle):
+    """
+    Per user (or per IP for anonymous requests) limit of the 'user' rate.
+    """
+
+class SlidingWindowScopedThrottle(ScopedRateThrottle, SlidingWindowRateThrottle):
+    """
+    Limit of the views setting `throttle_scope`, using the rate of that scope.
+    """
@@ -7,5 +7,6 @@ router.register(r'users', views.UserViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('auth/token-cache/', views.TokenCacheStatsView.as_view(), name='token-cache-stats'),
     path('auth/', include('rest_framework.urls')), 
 ]
\ No newline at end of file
@@ -1,15 +1,94 @@
 # views.py
-from rest_framework import viewsets, permissions
+from rest_framework import exceptions, viewsets, permissions, status
+from rest_framework.views import APIView
+from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.parsers import JSONParser
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer, UserCreateSerializer, UserUpdateSerializer
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from .serializers import UserSerializer, UserCreateSerializer, UserUpdateSerializer, serializer_columns
 from .permissions import IsSelf
+from .pagination import UserKeysetPagination
+from .conditional import conditional_response, set_validators
+from .parsers import NDJSONParser
+from .bulk import bulk_create_users, bulk_update_users, bulk_delete_users
+from .export import EXPORT_FORMATS, aiter_export, iter_export
+from .authentication import token_cache
+from .models import APIToken
+from .throttling import SlidingWindowScopedThrottle
 
 class UserViewSet(viewsets.ModelViewSet):
     User = get_user_model()
-    queryset = User.objects.all()
+    # Stable ordering, served by the (date_joined, id) index
+    queryset = User.objects.order_by('date_joined', 'id')
     
+    @property
+    def paginator(self):
+        """
+        Keyset pagination when asked for with ?pagination=keyset (or when following one of
+        its cursor links), page number pagination otherwise.
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if 'cursor' in params or params.get('pagination') == 'keyset':
+                self._paginator = UserKeysetPagination()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['list', 'retrieve']:
+            # Read only the columns the serializer renders (no password, permission flags...)
+            # plus the ordering columns, which keyset pagination reads from the last row
+            columns = serializer_columns(self.get_serializer())
+            columns.update(field.lstrip('-') for field in queryset.query.order_by)
+            if self.action == 'retrieve':
+                # Version for the ETag / Last-Modified headers
+                columns.add('updated_at')
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        # Sparse fieldsets only narrow what is read, never what is written
+        if self.request.method == 'GET' and self.action in ['list', 'retrieve', 'me']:
+            kwargs.update(self.get_sparse_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_sparse_fieldset(self):
+        """
+        Parse ?fields=id,username and ?exclude=email into serializer keyword arguments.
+        The SQL column list follows the narrowed serializer, see get_queryset.
+        """
+        fieldset = {}
+        for param in ['fields', 'exclude']:
+            value = self.request.query_params.get(param)
+            if value:
+                fieldset[param] = [name.strip() for name in value.split(',') if name.strip()]
+        return fieldset
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        # Answer If-None-Match / If-Modified-Since with a 304 before serializing anything
+        response = conditional_response(request, instance)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return set_validators(response, instance)
+
+    def update(self, request, *args, **kwargs):
+        # Optimistic concurrency: refuse the write if If-Match doesn't match the current version
+        instance = self.get_object()
+        response = conditional_response(request, instance)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(instance, data=request.data, partial=kwargs.pop('partial', False))
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return set_validators(Response(serializer.data), serializer.instance)
+
     def get_serializer_class(self):
         if self.action == 'create':
             return UserCreateSerializer
@@ -33,8 +112,23 @@ class UserViewSet(viewsets.ModelViewSet):
         Get or update the user information
 
         Endpoint: /api/users/me/
+
+        Reads reuse the user already loaded by authentication, so no extra query is made.
+        Writes reload it: authentication may hand out a cached copy, up to TOKEN_CACHE_TTL old,
+        of a user deactivated since.
         """
         user = request.user
+        if request.method in ['PUT', 'PATCH']:
+            user = self.User.objects.filter(pk=user.pk, is_active=True).first()
+            if user is None:
+                token_cache.invalidate_user(request.user.pk)
+                raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        # 304 for an unchanged user on GET, 412 for a stale If-Match on PUT / PATCH
+        response = conditional_response(request, user)
+        if response is not None:
+            return set_validators(response, user)
+
         serializer = self.get_serializer(user)
         
         if request.method in ['PUT', 'PATCH']:
@@ -46,4 +140,93 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer.is_valid(raise_exception=True)
             serializer.save()
             
-        return Response(serializer.data)
\ No newline at end of file
+        return set_validators(Response(serializer.data), user)
+
+    @action(detail=False, methods=['POST', 'PATCH', 'DELETE'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Create, update or delete users in bulk (admin only)
+
+        Endpoint: /api/users/bulk/
+        Body: a JSON array or NDJSON (application/x-ndjson), one item per user
+            POST: user objects, like POST /api/users/ without the profile image
+            PATCH: objects with the user `id` and the fields to change
+            DELETE: user ids
+        Returns the processed items and per-item errors, both with the item index.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Expected a list of items.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == 'POST':
+            results, errors = bulk_create_users(items)
+            success = status.HTTP_201_CREATED
+        elif request.method == 'PATCH':
+            results, errors = bulk_update_users(items)
+            success = status.HTTP_200_OK
+        else:
+            results, errors = bulk_delete_users(items)
+            success = status.HTTP_200_OK
+
+        errors.sort(key=lambda error: error['index'])
+        if not errors:
+            response_status = success
+        elif results:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'results': results, 'errors': errors}, status=response_status)
+
+    @action(detail=False, methods=['GET'])
+    def export(self, request):
+        """
+        Stream every user (admin only)
+
+        Endpoint: /api/users/export/?type=ndjson (default) or ?type=csv
+        """
+        export_format = request.query_params.get('type', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'detail': f'Unknown export type, use one of: {", ".join(sorted(EXPORT_FORMATS))}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Served by ASGI, the response needs an async iterator to be streamed
+        stream = aiter_export if isinstance(request._request, ASGIRequest) else iter_export
+        response = StreamingHttpResponse(
+            stream(export_format, context={'request': request}),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="users.{export_format}"'
+        return response
+
+class TokenCacheStatsView(APIView):
+    """
+    Hit rate, latency and size of this process' token authentication cache (admin only)
+
+    Endpoint: /api/auth/token-cache/
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(token_cache.stats())
+
+class ObtainAPITokenView(ObtainAuthToken):
+    """
+    Exchange a username and password for a new expiring API token.
+    The token is only returned here, the server keeps nothing but its hash.
+
+    Endpoint: /api-token-auth/
+    Use it as: Authorization: Bearer <token>
+    """
+    # Password guessing endpoint: limited per IP, whatever the global throttles are
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = 'login'
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token, key = APIToken.issue(serializer.validated_data['user'], name=request.data.get('name', ''))
+        return Response({'token': key, 'expires_at': token.expires_at}, status=status.HTTP_201_CREATED)
+
+obtain_api_token = ObtainAPITokenView.as_view()
@@ -1,7 +1,29 @@
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+def warm_templates(templates_dir):
+    """
+    Load every template under templates_dir, so the cached template loader holds them
+    all parsed before the first request instead of parsing each on its first render.
+    """
+    from django.template.loader import get_template
+
+    for root, _, files in os.walk(templates_dir):
+        for filename in files:
+            if filename.endswith('.html'):
+                name = os.path.relpath(os.path.join(root, filename), templates_dir)
+                get_template(name.replace(os.sep, '/'))
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
-    verbose_name = 'Users Management'
\ No newline at end of file
+    verbose_name = 'Users Management'
+
+    def ready(self):
+        from . import checks  # noqa: F401 registers the system checks
+        if getattr(settings, 'TEMPLATES_WARMUP', False):
+            warm_templates(os.path.join(self.path, 'templates'))
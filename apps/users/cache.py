@@ -0,0 +1,63 @@
+"""
+Cache of the public part of the profile pages.
+
+Everything cached for a profile is keyed by the username and the profile's current
+version. Saving or deleting the user bumps the version (see the signals in models.py),
+so the old entries are never read again and simply expire.
+
+With several processes the default cache must be shared (Redis, Memcached) for the
+invalidation to reach every one of them; with LocMemCache other processes may serve a
+stale profile for up to PROFILE_CACHE_TIMEOUT seconds.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def profile_cache_timeout():
+    return getattr(settings, 'PROFILE_CACHE_TIMEOUT', 300)
+
+
+def profile_key(kind, username, *parts):
+    # Usernames may contain characters some cache backends reject in keys
+    digest = hashlib.sha256(username.encode()).hexdigest()[:32]
+    return ':'.join(['profile', kind, digest, *map(str, parts)])
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def profile_version(username):
+    return cache.get_or_set(profile_key('version', username), new_version, None)
+
+
+async def aprofile_version(username):
+    return await cache.aget_or_set(profile_key('version', username), new_version, None)
+
+
+def bump_profile_version(*usernames):
+    """
+    Invalidate everything cached for these profiles.
+    """
+    cache.set_many({profile_key('version', username): new_version() for username in usernames if username}, None)
+
+
+# Columns of the owner that profile.html renders. Only these are loaded and cached, the
+# password hash, email and permission flags never reach the cache.
+PROFILE_OWNER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'profile_image')
+
+
+async def aget_profile_owner(username, version, load):
+    """
+    The owner of a profile from the cache, or `await load()` stored for next time.
+    load() should read PROFILE_OWNER_FIELDS only.
+    """
+    key = profile_key('owner', username, version)
+    owner = await cache.aget(key)
+    if owner is None:
+        owner = await load()
+        await cache.aset(key, owner, profile_cache_timeout())
+    return owner
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends keeping their entries in each process: every worker would count its own hits
+PER_PROCESS_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches)
+def check_ratelimit_cache(app_configs, **kwargs):
+    """
+    Rate limits only hold across workers with a shared cache, see users.security.ratelimit.
+    Development servers (DEBUG) run a single process and may use any cache.
+    """
+    alias = getattr(settings, 'RATELIMIT_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if settings.DEBUG or backend not in PER_PROCESS_CACHES:
+        return []
+    return [Error(
+        f"RATELIMIT_CACHE_ALIAS '{alias}' uses {backend}, which is not shared between processes.",
+        hint='Use base.cache.sqlite.SQLiteCache in shared memory, Redis or Memcached.',
+        id='users.E001',
+    )]
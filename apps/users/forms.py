@@ -1,6 +1,8 @@
 from django import forms
+from django.contrib.auth import aauthenticate
+from django.contrib.auth.forms import AuthenticationForm
 from .models import User
-from PIL import Image  # Used to validate image dimensions
+from .images.validators import validate_profile_image
 
 # ModelForm for user signup
 class Signup_Form(forms.ModelForm):
@@ -15,28 +17,8 @@ class Signup_Form(forms.ModelForm):
         fields = ['username', 'first_name', 'last_name', 'email', 'profile_image']
 
     def clean_profile_image(self):
-        image_file = self.cleaned_data.get('profile_image')
-
-        if image_file:
-            # Validate file size
-            max_size = 2 * 1024 * 1024  # 2 MB
-            if image_file.size > max_size:
-                raise forms.ValidationError("The image must not exceed 2MB.")
-
-            # Validate image dimensions
-            img = Image.open(image_file)
-            max_width = 1024
-            max_height = 1024
-            if img.width > max_width or img.height > max_height:
-                # Raise an error if the image dimensions are bigger than the maximum dimenssions
-                raise forms.ValidationError(
-                    f"The image must be a maximum of {max_width}x{max_height} pixels."
-                )
-
-            # Reset the file pointer to the beginning to avoid stream issues
-            image_file.seek(0)
-
-        return image_file
+        # Validate file size and image dimensions
+        return validate_profile_image(self.cleaned_data.get('profile_image'))
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
@@ -85,21 +67,28 @@ class UserUpdateForm(forms.ModelForm):
         fields = ['username', 'first_name', 'last_name', 'profile_image']
 
     def clean_profile_image(self):
-        image = self.cleaned_data.get('profile_image')
-
-        if image:
-            # Validate file size
-            max_size = 2 * 1024 * 1024  
-            if image.size > max_size:
-                raise forms.ValidationError("The image must not exceed 2MB.")
-
-            # Validate image dimensions
-            img = Image.open(image)
-            max_width, max_height = 1024, 1024
-            if img.width > max_width or img.height > max_height:
-                # Raise an error if the image dimensions are bigger than the maximum dimenssions
-                raise forms.ValidationError(
-                    f"The image must be a maximum of {max_width}x{max_height} pixels."
-                )
-
-        return image
+        # Validate file size and image dimensions
+        return validate_profile_image(self.cleaned_data.get('profile_image'))
+
+
+# AuthenticationForm for the async login view
+class Login_Form(AuthenticationForm):
+    async def ais_valid(self):
+        """
+        is_valid() with the credentials checked by aauthenticate() first: the password
+        hash is awaited from the hashing pool (see PooledModelBackend), no thread is
+        blocked on it.
+        """
+        username = self.fields['username'].to_python(self.data.get('username'))
+        password = self.data.get('password')
+        if username and password:
+            self.user_cache = await aauthenticate(self.request, username=username, password=password)
+        return self.is_valid()
+
+    def clean(self):
+        # The user was authenticated by ais_valid(), only report the outcome
+        if self.cleaned_data.get('username') and self.cleaned_data.get('password'):
+            if self.user_cache is None:
+                raise self.get_invalid_login_error()
+            self.confirm_login_allowed(self.user_cache)
+        return self.cleaned_data
@@ -0,0 +1,140 @@
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class FileReaper:
+    """
+    Background thread that deletes files from storage in batches, off the request path.
+
+    Files are scheduled in groups (an image and its thumbnails) with an optional keep_if
+    check, run right before the deletion: a file that got referenced again while it was
+    queued is kept. Saving the same content again also cancels its pending deletion,
+    see ContentAddressedStorage.save().
+
+    Files still waiting when the process exits are left behind as orphans and are
+    removed later by the `collect_orphan_images` management command.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        # (storage, first name of the group) -> (names, keep_if) of the groups still queued
+        self._pending = {}
+        self._thread = None
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'PROFILE_IMAGE_REAPER_BATCH_SIZE', 100)
+
+    @property
+    def interval(self):
+        return getattr(settings, 'PROFILE_IMAGE_REAPER_INTERVAL', 2)
+
+    def schedule(self, storage, names, keep_if=None):
+        """
+        Queue a group of files for deletion and make sure the worker thread is running.
+        keep_if is called just before deleting them; when it returns True they are kept.
+        """
+        key = (storage, names[0])
+        with self._lock:
+            self._pending[key] = (names, keep_if)
+        self._queue.put(key)
+        self._ensure_started()
+
+    def cancel(self, storage, name):
+        """
+        Drop the pending deletion of the group scheduled under name, if any. Waits for
+        the deletion when it is already running, the file is then gone on return.
+        """
+        with self._lock:
+            return self._pending.pop((storage, name), None) is not None
+
+    def flush(self):
+        """
+        Delete everything still pending in the calling thread.
+        """
+        with self._lock:
+            keys = list(self._pending)
+        self._delete_groups(keys)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='profile-image-reaper', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self._delete_batch()
+            finally:
+                # keep_if checks query the database, don't keep a connection open while idle
+                connections.close_all()
+
+    def _delete_batch(self):
+        """
+        Wait for a queued group of files, give other deletions `interval` seconds to pile
+        up into the same batch, then delete up to batch_size groups.
+        """
+        keys = [self._queue.get()]
+        threading.Event().wait(self.interval)
+        while len(keys) < self.batch_size:
+            try:
+                keys.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._delete_groups(keys)
+
+    def _delete_groups(self, keys):
+        for key in keys:
+            storage = key[0]
+            with self._lock:
+                group = self._pending.get(key)
+            if group is None:
+                # Cancelled, or already handled by an earlier queue entry
+                continue
+            names, keep_if = group
+            try:
+                keep = keep_if is not None and keep_if()
+            except Exception:
+                # Keeping the files is safe, collect_orphan_images removes them if unused
+                logger.exception('Could not check whether %s is still used', names[0])
+                keep = True
+
+            # Under the lock, so an upload of the same content (cancel()) waits for the deletion
+            with self._lock:
+                if self._pending.get(key) is not group:
+                    # Cancelled or scheduled again while checking
+                    continue
+                del self._pending[key]
+                if keep:
+                    continue
+                for name in names:
+                    try:
+                        storage.delete(name)
+                    except OSError:
+                        logger.exception('Could not delete %s', name)
+
+
+reaper = FileReaper()
+
+
+def delete_files_on_commit(storage, names, keep_if=None):
+    """
+    Delete files once the current transaction commits, so a rollback never leaves a
+    row pointing at a file that is gone. Outside a transaction this schedules immediately.
+
+    keep_if is called by the reaper right before deleting; when it returns True the
+    files are kept (e.g. because another row references them again).
+    """
+    names = list(names)
+    if not names:
+        return
+
+    transaction.on_commit(lambda: reaper.schedule(storage, names, keep_if), robust=True)
@@ -0,0 +1,72 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+from .reaper import reaper
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names files after the SHA-256 of their content.
+
+        profile_images/Captura_de_pantalla.png -> profile_images/3f/a2/3fa2...e9.png
+
+    Files are sharded into two levels of subdirectories to keep directories small,
+    identical uploads share a single file, and a stored file never changes, so its
+    URL can be served with far-future immutable cache headers.
+
+    Several rows may point to the same file: callers must check that no row
+    references a file anymore before deleting it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Two uploads of the same content write the same bytes to the same name
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(*args, **kwargs)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        name = self.content_name(name, content)
+
+        # Deduplicate: the content is already stored. A deletion still queued for it
+        # (the previous owner replaced it) must not remove the file from under this upload.
+        reaper.cancel(self, name)
+        if self.exists(name):
+            # Fresh again for collect_orphan_images --min-age, the upload is still in flight
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def save_derivative(self, name, content):
+        """
+        Store a file derived from a stored original (e.g. a thumbnail) under the exact name
+        given. Such names are built from the original's hash, so they are already unique.
+        """
+        return super().save(name, content)
+
+    @staticmethod
+    def content_name(name, content):
+        """
+        Build the sharded, content addressed name for content uploaded as name.
+        """
+        sha256 = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+
+        digest = sha256.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest[2:4], f'{digest}{extension}').replace('\\', '/')
+
+
+profile_image_storage = ContentAddressedStorage()
+
+
+def get_profile_image_storage():
+    return profile_image_storage
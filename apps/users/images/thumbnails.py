@@ -0,0 +1,101 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+# Square thumbnail sizes in pixels: profile page card and navigation bar avatar
+THUMBNAIL_SIZES = {
+    'profile': 150,
+    'nav': 48,
+}
+
+
+def thumbnail_format():
+    """
+    WebP when Pillow was built with it, JPEG otherwise.
+    """
+    preferred = getattr(settings, 'PROFILE_THUMBNAIL_FORMAT', 'WEBP')
+    if preferred == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return preferred
+
+
+def thumbnail_name(name, size):
+    """
+    profile_images/photo.png -> profile_images/thumbs/150/photo.png.webp
+
+    The original extension is kept so photo.png and photo.jpg get different thumbnails.
+    """
+    directory, filename = os.path.split(name)
+    extension = 'webp' if thumbnail_format() == 'WEBP' else 'jpg'
+    return f'{directory}/thumbs/{size}/{filename}.{extension}'
+
+
+def original_name(name):
+    """
+    profile_images/thumbs/150/photo.png.webp -> profile_images/photo.png, None for an original.
+    """
+    parts = name.split('/')
+    if len(parts) < 3 or parts[-3] != 'thumbs':
+        return None
+    return '/'.join(parts[:-3] + [os.path.splitext(parts[-1])[0]])
+
+
+def generate_thumbnail(field_file, size):
+    """
+    Build a size x size cropped thumbnail of the image and store it next to the original.
+    """
+    storage = field_file.storage
+    name = thumbnail_name(field_file.name, size)
+
+    with storage.open(field_file.name, 'rb') as source:
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            thumb = ImageOps.fit(img.convert('RGB'), (size, size), Image.LANCZOS)
+
+    buffer = BytesIO()
+    thumb.save(buffer, thumbnail_format(), quality=85)
+
+    save_derivative = getattr(storage, 'save_derivative', None)
+    if save_derivative:
+        # Content addressed storage would rename the thumbnail after its own hash
+        return save_derivative(name, ContentFile(buffer.getvalue()))
+
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def generate_thumbnails(field_file):
+    """
+    Build every thumbnail size, used right after a new image is uploaded.
+    """
+    for size in THUMBNAIL_SIZES.values():
+        generate_thumbnail(field_file, size)
+
+
+def get_thumbnail_url(field_file, size, generate=True):
+    """
+    URL of a thumbnail, generated lazily (and cached on disk) the first time it is requested.
+    Falls back to the original image if the thumbnail cannot be built.
+
+    With generate=False the URL is built from the name alone, without touching the storage:
+    thumbnails are generated when the image is saved, so it is there unless that failed.
+    """
+    name = thumbnail_name(field_file.name, size)
+    storage = field_file.storage
+    if generate and not storage.exists(name):
+        try:
+            generate_thumbnail(field_file, size)
+        except (OSError, ValueError):
+            return field_file.url
+    return storage.url(name)
+
+
+def thumbnail_names(name):
+    """
+    Names of every thumbnail derived from the image stored under name.
+    """
+    return [thumbnail_name(name, size) for size in THUMBNAIL_SIZES.values()]
@@ -0,0 +1,53 @@
+import warnings
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
+
+MAX_IMAGE_SIZE = 2 * 1024 * 1024  # 2 MB
+MAX_IMAGE_WIDTH = 1024
+MAX_IMAGE_HEIGHT = 1024
+
+
+def validate_profile_image(image_file):
+    """
+    Validate an uploaded profile image without decoding it.
+
+    Image.open only parses the file header, which is enough to know the format and
+    dimensions, so oversized or decompression-bomb images are rejected before any
+    pixel data is read. The stream is always rewound before returning.
+
+    Files that are not new uploads (the image already stored for the user) are
+    returned untouched, since they were validated when they were uploaded.
+    """
+    if not isinstance(image_file, UploadedFile):
+        return image_file
+
+    # Validate file size, known from the upload without reading the body
+    if image_file.size > MAX_IMAGE_SIZE:
+        raise ValidationError("The image must not exceed 2MB.")
+
+    image_file.seek(0)
+    try:
+        with warnings.catch_warnings():
+            # Treat PIL's decompression bomb warning as an error instead of a log line
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            with Image.open(image_file) as img:
+                width, height = img.size
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise ValidationError(
+            f"The image must be a maximum of {MAX_IMAGE_WIDTH}x{MAX_IMAGE_HEIGHT} pixels."
+        )
+    except Exception:
+        raise ValidationError("Invalid image file.")
+    finally:
+        # Reset the file pointer to the beginning to avoid stream issues
+        image_file.seek(0)
+
+    # Validate image dimensions
+    if width > MAX_IMAGE_WIDTH or height > MAX_IMAGE_HEIGHT:
+        raise ValidationError(
+            f"The image must be a maximum of {MAX_IMAGE_WIDTH}x{MAX_IMAGE_HEIGHT} pixels."
+        )
+
+    return image_file
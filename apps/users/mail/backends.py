@@ -0,0 +1,161 @@
+import os
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+
+
+class SMTPConnectionPool:
+    """
+    Process-wide pool of authenticated SMTP sessions, keyed by server and credentials.
+
+    Idle connections are health checked with NOOP before reuse and dropped once they
+    have been idle longer than the server is likely to keep them open.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.stats = {'handshakes': 0, 'reused': 0, 'discarded': 0}
+
+    def checkout(self, key, idle_timeout):
+        """
+        Return a live (connection, messages_sent) pair for the key, or None if a new
+        session has to be opened.
+        """
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                connection, messages_sent, released_at = idle.pop()
+
+            if time.monotonic() - released_at > idle_timeout or not self._is_alive(connection):
+                self.discard(connection)
+                continue
+
+            with self._lock:
+                self.stats['reused'] += 1
+            return connection, messages_sent
+
+    def release(self, key, connection, messages_sent, max_size):
+        """
+        Put a connection back in the pool, closing it if the pool is already full.
+        """
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < max_size:
+                idle.append((connection, messages_sent, time.monotonic()))
+                return
+        self.discard(connection)
+
+    def discard(self, connection):
+        with self._lock:
+            self.stats['discarded'] += 1
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+    def record_handshake(self):
+        with self._lock:
+            self.stats['handshakes'] += 1
+
+    def reset(self):
+        """
+        Forget every pooled connection without talking to the server.
+        Used in forked children, which must not share sockets with their parent.
+        """
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    @staticmethod
+    def _is_alive(connection):
+        try:
+            return connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+
+pool = SMTPConnectionPool()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=pool.reset)
+
+
+class PooledSMTPEmailBackend(EmailBackend):
+    """
+    SMTP backend that borrows sessions from a per-process pool instead of doing a
+    TCP + TLS + AUTH handshake for every batch of emails.
+
+    Settings:
+        SMTP_POOL_SIZE: idle connections kept per server (default 2)
+        SMTP_POOL_IDLE_TIMEOUT: seconds before an idle connection is reopened (default 60)
+        SMTP_POOL_MAX_MESSAGES: messages sent over one session before it is retired (default 100)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_size = getattr(settings, 'SMTP_POOL_SIZE', 2)
+        self.idle_timeout = getattr(settings, 'SMTP_POOL_IDLE_TIMEOUT', 60)
+        self.max_messages = getattr(settings, 'SMTP_POOL_MAX_MESSAGES', 100)
+        self.messages_sent = 0
+
+    @property
+    def pool_key(self):
+        return (self.host, self.port, self.username, self.use_tls, self.use_ssl)
+
+    def open(self):
+        if self.connection:
+            return False
+
+        pooled = pool.checkout(self.pool_key, self.idle_timeout)
+        if pooled:
+            self.connection, self.messages_sent = pooled
+            return True
+
+        opened = super().open()
+        if self.connection:
+            pool.record_handshake()
+            self.messages_sent = 0
+        return opened
+
+    def close(self):
+        if self.connection is None:
+            return
+        try:
+            if self.messages_sent >= self.max_messages:
+                # Servers often cap the messages per session, start a fresh one
+                pool.discard(self.connection)
+            else:
+                pool.release(self.pool_key, self.connection, self.messages_sent, self.pool_size)
+        finally:
+            self.connection = None
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        with self._lock:
+            new_conn_created = self.open()
+            if not self.connection or new_conn_created is None:
+                return 0
+            num_sent = 0
+            try:
+                for message in email_messages:
+                    if self.messages_sent >= self.max_messages:
+                        # Rotate to a fresh session in the middle of a large batch
+                        self.close()
+                        self.open()
+                    if self._send(message):
+                        num_sent += 1
+                        self.messages_sent += 1
+            except (smtplib.SMTPException, OSError):
+                # Never hand a session that just failed back to the pool
+                self.messages_sent = self.max_messages
+                raise
+            finally:
+                if new_conn_created:
+                    self.close()
+        return num_sent
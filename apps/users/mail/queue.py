@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from users.models import OutboundEmail
+
+
+def enqueue_mail(subject, message, from_email, recipient_list):
+    """
+    Store an email in the outbound queue instead of sending it during the request.
+    The message is delivered later by the `send_queued_mail` management command.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        to=','.join(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff for failed sends: base, 2*base, 4*base... capped at MAIL_QUEUE_MAX_BACKOFF.
+    """
+    base = getattr(settings, 'MAIL_QUEUE_RETRY_BACKOFF', 60)
+    cap = getattr(settings, 'MAIL_QUEUE_MAX_BACKOFF', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def claim_due_messages(batch_size):
+    """
+    Lock a batch of due messages and push their next attempt forward by the lease time,
+    so a second worker (or this one after a crash) does not send them twice while we work.
+    """
+    lease = timedelta(seconds=getattr(settings, 'MAIL_QUEUE_LEASE', 300))
+    now = timezone.now()
+
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(
+            status=OutboundEmail.STATUS_PENDING,
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at')
+        messages = list(
+            due.select_for_update(
+                skip_locked=connection.features.has_select_for_update_skip_locked
+            )[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[m.pk for m in messages]).update(
+            next_attempt_at=now + lease
+        )
+    return messages
+
+
+def send_pending(batch_size=None):
+    """
+    Deliver one batch of queued messages over a single SMTP session.
+
+    Returns a (sent, failed) tuple. Failed messages are rescheduled with backoff until
+    MAIL_QUEUE_MAX_ATTEMPTS is reached, then marked as failed.
+    """
+    batch_size = batch_size or getattr(settings, 'MAIL_QUEUE_BATCH_SIZE', 50)
+    max_attempts = getattr(settings, 'MAIL_QUEUE_MAX_ATTEMPTS', 5)
+
+    queued = claim_due_messages(batch_size)
+    if not queued:
+        return 0, 0
+
+    smtp = get_connection(fail_silently=False)
+    try:
+        # One connection for the whole batch instead of one handshake per message
+        smtp.open()
+    except Exception as e:
+        # The server is unreachable: every message in the batch counts as a failed attempt
+        for queued_mail in queued:
+            record_failure(queued_mail, e, max_attempts)
+        return 0, len(queued)
+
+    sent = failed = 0
+    try:
+        for queued_mail in queued:
+            email = EmailMessage(
+                queued_mail.subject,
+                queued_mail.body,
+                queued_mail.from_email,
+                queued_mail.recipients,
+                connection=smtp,
+            )
+            try:
+                email.send()
+            except Exception as e:
+                failed += 1
+                record_failure(queued_mail, e, max_attempts)
+            else:
+                sent += 1
+                queued_mail.attempts += 1
+                queued_mail.status = OutboundEmail.STATUS_SENT
+                queued_mail.sent_at = timezone.now()
+                queued_mail.last_error = ''
+                queued_mail.save(update_fields=['attempts', 'last_error', 'status', 'sent_at'])
+    finally:
+        smtp.close()
+
+    return sent, failed
+
+
+def record_failure(queued_mail, error, max_attempts):
+    """
+    Reschedule a message with backoff, or give up on it after max_attempts.
+    """
+    queued_mail.attempts += 1
+    queued_mail.last_error = str(error)
+    if queued_mail.attempts >= max_attempts:
+        queued_mail.status = OutboundEmail.STATUS_FAILED
+    else:
+        queued_mail.next_attempt_at = timezone.now() + retry_delay(queued_mail.attempts)
+    queued_mail.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
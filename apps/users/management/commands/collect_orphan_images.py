@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.images.thumbnails import original_name, thumbnail_names
+from users.models import User
+
+PROFILE_IMAGES_DIR = 'profile_images'
+
+
+class Command(BaseCommand):
+    help = 'Delete files under media/profile_images that no user references anymore.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only list the orphaned files.')
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help='Skip files modified less than this many seconds ago (uploads still in flight).')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Files deleted between progress reports.')
+
+    def handle(self, *args, **options):
+        storage = User._meta.get_field('profile_image').storage
+
+        # Every stored image and its thumbnails are in use
+        referenced = set()
+        images = (
+            User.objects.exclude(profile_image__isnull=True)
+            .exclude(profile_image='')
+            .values_list('profile_image', flat=True)
+        )
+        for name in images.iterator(chunk_size=2000):
+            referenced.add(name)
+            referenced.update(thumbnail_names(name))
+
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        orphans = [
+            name for name in self.walk(storage, PROFILE_IMAGES_DIR)
+            if name not in referenced and storage.get_modified_time(name) < cutoff
+        ]
+
+        if options['dry_run']:
+            for name in orphans:
+                self.stdout.write(name)
+            self.stdout.write(f'{len(orphans)} orphaned file(s) found.')
+            return
+
+        batch_size = options['batch_size']
+        deleted = 0
+        for start in range(0, len(orphans), batch_size):
+            for name in orphans[start:start + batch_size]:
+                # The walk took a while: an upload of the same content may use the file by now
+                if self.in_use(storage, name, cutoff):
+                    continue
+                storage.delete(name)
+                deleted += 1
+            self.stdout.write(f'Checked {min(start + batch_size, len(orphans))}/{len(orphans)} file(s), {deleted} deleted.')
+
+        if not orphans:
+            self.stdout.write('No orphaned files found.')
+
+    def in_use(self, storage, name, cutoff):
+        """
+        Check again, right before deleting, that no user references the file (or the image
+        of a thumbnail) and that it wasn't saved again since the walk.
+        """
+        if storage.get_modified_time(name) >= cutoff:
+            return True
+        return User.objects.filter(profile_image=original_name(name) or name).exists()
+
+    def walk(self, storage, path):
+        """
+        Yield the name of every file below path, recursively.
+        """
+        if not storage.exists(path):
+            return
+        directories, files = storage.listdir(path)
+        for filename in files:
+            yield f'{path}/{filename}'
+        for directory in directories:
+            yield from self.walk(storage, f'{path}/{directory}')
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.mail.queue import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Deliver the emails waiting in the outbound mail queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Messages sent per SMTP session (default: MAIL_QUEUE_BATCH_SIZE).')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep draining the queue instead of exiting once it is empty.')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds to sleep between polls when the queue is empty (with --loop).')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_pending(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent} email(s), {failed} failed.')
+                # There may be more due messages, keep going without sleeping
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
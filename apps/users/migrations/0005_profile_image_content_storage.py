@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:29
+
+import users.images.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='profile_image',
+            field=models.ImageField(blank=True, db_index=True, null=True, storage=users.images.storage.get_profile_image_storage, upload_to='profile_images/'),
+        ),
+    ]
@@ -1,8 +1,13 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-import os
 from django.dispatch import receiver
-from django.db.models.signals import pre_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.utils import timezone
+
+from .cache import bump_profile_version
+from .images.reaper import delete_files_on_commit
+from .images.storage import get_profile_image_storage
+from .images.thumbnails import THUMBNAIL_SIZES, generate_thumbnails, get_thumbnail_url, thumbnail_names
 
 class User(AbstractUser):
 
@@ -11,36 +16,188 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     is_verified = models.BooleanField(default=False)
     mails_count = models.IntegerField(default=0)
-    profile_image = models.ImageField(upload_to='profile_images/', blank=True, null=True)
+    # Content addressed: identical uploads share one file, see ContentAddressedStorage
+    profile_image = models.ImageField(
+        upload_to='profile_images/', storage=get_profile_image_storage, blank=True, null=True, db_index=True
+    )
+    # Bumped on every save, used as the version of the user for API ETags / Last-Modified
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset pagination of /api/users/ walks this index
+            models.Index(fields=['date_joined', 'id'], name='users_user_joined_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored image so the pre_save signal can detect a change without a query.
+        # When the column was deferred nothing is recorded and the signal falls back to the database.
+        if 'profile_image' in instance.__dict__:
+            instance._loaded_profile_image = instance.profile_image.name or ''
+        # Same for the username, the cached profile under the old name must be dropped on rename
+        if 'username' in instance.__dict__:
+            instance._loaded_username = instance.username
+        return instance
+
+    def increment_counter(self, field, by=1):
+        """
+        Atomically add `by` to a counter column with a single UPDATE ... SET field = field + by.
+        Concurrent increments are never lost, no signal runs and no other column is written.
+
+        The in-memory value is dropped rather than re-read: it is loaded again on first
+        access, and a later save() of this instance leaves the counter alone.
+        """
+        type(self).objects.filter(pk=self.pk).update(**{field: models.F(field) + by})
+        self.__dict__.pop(field, None)
+
+    def profile_image_thumbnail_url(self, size_name, generate=True):
+        """
+        URL of one of the THUMBNAIL_SIZES derivatives of the profile image, or None without image.
+        generate=False skips the existence check and lazy generation, see get_thumbnail_url.
+        """
+        if not self.profile_image:
+            return None
+        return get_thumbnail_url(self.profile_image, THUMBNAIL_SIZES[size_name], generate)
+
+    @property
+    def profile_thumbnail_url(self):
+        # 150x150 thumbnail shown on the profile page
+        return self.profile_image_thumbnail_url('profile')
+
+    @property
+    def nav_thumbnail_url(self):
+        # 48x48 thumbnail shown in the navigation bar
+        return self.profile_image_thumbnail_url('nav')
+
+
+class OutboundEmail(models.Model):
+    """
+    Durable outbound mail queue.
+    Views only insert rows here; the `send_queued_mail` command delivers them.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    # Comma separated list of recipient addresses
+    to = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # The worker only picks up pending messages whose next attempt is due
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='users_outbound_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.to} ({self.status})'
+
+    @property
+    def recipients(self):
+        return [address for address in self.to.split(',') if address]
+
+def delete_profile_image_files(storage, name):
+    """
+    Deletes an image and its thumbnails in the background once the transaction commits.
+    Identical uploads share one file, so it is only deleted when no user references it anymore.
+    """
+    delete_files_on_commit(
+        storage,
+        [name] + thumbnail_names(name),
+        keep_if=lambda: User.objects.filter(profile_image=name).exists(),
+    )
 
 @receiver(pre_save, sender=User)
-def delete_old_profile_image(sender, instance, **kwargs):
+def detect_profile_image_change(sender, instance, update_fields=None, **kwargs):
     """
-    Deletes the old profile image from the file system when a new image is uploaded.
-    This signal is triggered before saving the User model.
+    Detects whether the profile image is being replaced before saving the User model.
+    The old file itself is only deleted after the save, in delete_old_profile_image.
     """
+    instance._profile_image_changed = False
+    instance._replaced_profile_image = ''
+
+    # Saves that don't write the image (last_login, verify_email...) can't replace it.
+    if update_fields is not None and 'profile_image' not in update_fields:
+        return
+
     # If this is a new user, there's no existing image to delete.
     if not instance.pk:
+        instance._profile_image_changed = bool(instance.profile_image)
         return
 
-    try:
-        old_instance = User.objects.get(pk=instance.pk)
-    except User.DoesNotExist:
-        return
+    old_name = getattr(instance, '_loaded_profile_image', None)
+    if old_name is None:
+        # Instance built without from_db or with the image deferred: ask the database.
+        old_name = User.objects.filter(pk=instance.pk).values_list('profile_image', flat=True).first() or ''
 
-    old_image = old_instance.profile_image
-    new_image = instance.profile_image
+    new_name = instance.profile_image.name or ''
 
-    # If an old image exists and it's different from the new one, remove the old file.
-    if old_image and old_image != new_image:
-        if os.path.isfile(old_image.path):
-            os.remove(old_image.path)
+    instance._profile_image_changed = bool(new_name) and old_name != new_name
+    if old_name and old_name != new_name:
+        instance._replaced_profile_image = old_name
+
+@receiver(post_save, sender=User)
+def delete_old_profile_image(sender, instance, update_fields=None, **kwargs):
+    """
+    Deletes the old profile image from the file system when a new image is uploaded.
+    The deletion waits for the transaction to commit, so a rollback keeps the old file.
+    """
+    if getattr(instance, '_replaced_profile_image', ''):
+        delete_profile_image_files(instance.profile_image.storage, instance._replaced_profile_image)
+        instance._replaced_profile_image = ''
+
+    # Keep the tracked image in sync, so the next save compares against it.
+    if update_fields is None or 'profile_image' in update_fields:
+        instance._loaded_profile_image = instance.profile_image.name or ''
+
+@receiver(post_save, sender=User)
+def create_profile_image_thumbnails(sender, instance, **kwargs):
+    """
+    Builds the profile image thumbnails once, right after a new image is saved.
+    If this fails they are built lazily the first time they are requested.
+    """
+    if not getattr(instance, '_profile_image_changed', False):
+        return
+    instance._profile_image_changed = False
+
+    try:
+        generate_thumbnails(instance.profile_image)
+    except (OSError, ValueError):
+        pass
 
 @receiver(post_delete, sender=User)
 def delete_profile_image_on_delete(sender, instance, **kwargs):
     """
     Deletes the profile image file from the file system when the User is deleted.
-    This signal is triggered after deleting the User model.
+    This signal is triggered after deleting the User model, the file goes once the deletion commits.
     """
-    if instance.profile_image and os.path.isfile(instance.profile_image.path):
-        os.remove(instance.profile_image.path)
+    if instance.profile_image:
+        delete_profile_image_files(instance.profile_image.storage, instance.profile_image.name)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_profile(sender, instance, update_fields=None, **kwargs):
+    """
+    Bumps the version of the cached profile page, under the current and the previous username.
+    """
+    # Logging in only writes last_login, which the profile page doesn't show
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_profile_version(instance.username, getattr(instance, '_loaded_username', None))
+    instance._loaded_username = instance.username
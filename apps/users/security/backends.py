@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .hashing import acheck_password, ahash_password, check_password, hash_password
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend checking passwords in the hashing process pool (users.security.hashing),
+    so PBKDF2 does not hold the GIL of the process serving the request.
+
+    Same behaviour as ModelBackend otherwise: unknown usernames still pay for one hash
+    to hide which accounts exist, and hashes made with outdated parameters are upgraded.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user (#20760).
+            hash_password(password)
+            return
+
+        is_correct, must_update = check_password(password, user.password)
+        if not is_correct:
+            return
+        if must_update:
+            user.password = hash_password(password)
+            user.save(update_fields=['password'])
+        if self.user_can_authenticate(user):
+            return user
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            await ahash_password(password)
+            return
+
+        is_correct, must_update = await acheck_password(password, user.password)
+        if not is_correct:
+            return
+        if must_update:
+            user.password = await ahash_password(password)
+            await user.asave(update_fields=['password'])
+        if self.user_can_authenticate(user):
+            return user
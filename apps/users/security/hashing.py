@@ -0,0 +1,98 @@
+"""
+Password hashing in a pool of worker processes.
+
+PBKDF2 is CPU bound and holds the GIL, so hashing many passwords on a request thread
+stalls every other request served by the same process. The pool is started lazily
+with the 'spawn' method (the web process has threads running) and every worker
+runs django.setup() with the parent's settings module.
+
+Login and signup hash or check a single password per request: they block on the pool
+(or await it on the ASGI path), so the serving process only waits on a future while
+the hashing runs in another process. The number of hashes in flight is bounded by the
+worker count, extra requests queue up for a worker.
+
+    PASSWORD_HASHING_WORKERS: number of worker processes (default: CPU count, 0 hashes
+    on the calling thread)
+"""
+import asyncio
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def worker_count():
+    workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', None)
+    return os.cpu_count() if workers is None else workers
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=worker_count(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(os.environ['DJANGO_SETTINGS_MODULE'],),
+            )
+        return _executor
+
+
+def hash_passwords(passwords):
+    """
+    Hash a list of raw passwords in parallel, returning the encoded hashes in order.
+    """
+    passwords = list(passwords)
+    if not worker_count() or len(passwords) <= 1:
+        # Hashing inline, or not worth a round trip to another process
+        return [make_password(password) for password in passwords]
+    executor = get_executor()
+    chunksize = max(1, len(passwords) // (worker_count() * 4))
+    return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+def hash_password(password):
+    """
+    make_password() in a worker process.
+    """
+    if not worker_count():
+        return make_password(password)
+    return get_executor().submit(make_password, password).result()
+
+
+def check_password(password, encoded):
+    """
+    Verify a password against its encoded hash in a worker process.
+    Returns (is_correct, must_update), must_update meaning the hash should be upgraded.
+    """
+    if not worker_count():
+        return verify_password(password, encoded)
+    return get_executor().submit(verify_password, password, encoded).result()
+
+
+async def ahash_password(password):
+    """
+    hash_password() for async code: the event loop keeps running while the worker hashes.
+    """
+    if not worker_count():
+        return make_password(password)
+    return await asyncio.wrap_future(get_executor().submit(make_password, password))
+
+
+async def acheck_password(password, encoded):
+    if not worker_count():
+        return verify_password(password, encoded)
+    return await asyncio.wrap_future(get_executor().submit(verify_password, password, encoded))
@@ -1,31 +1,71 @@
-
-from django.contrib.auth import logout
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import alogout, logout
 from django.utils import timezone
 from django.contrib import messages
 
 class SessionTimeoutMiddleware:
-    
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
         """
-        If the user does not perform any action for a while, the middleware checks the last activity timestamp 
+        If the user does not perform any action for a while, the middleware checks the last activity timestamp
         and compares it with the current time. If more than 30 minutes have passed, the user is automatically logged out.
+
+        The timestamp is only written back to the session when it has moved by at least
+        SESSION_ACTIVITY_GRANULARITY seconds, so most requests don't cause a session write.
+        The last request may thus be up to that long after the stored timestamp, which the
+        timeout check allows for: an active user is never logged out early, an idle one is
+        logged out between SESSION_TIMEOUT and SESSION_TIMEOUT + SESSION_ACTIVITY_GRANULARITY
+        seconds after the last request. A granularity of 0 makes the timeout exact.
+
+        Under ASGI the middleware runs natively async, without a thread hop, and leaves
+        request.user resolved so async views and templates can read it directly.
         """
-        
+        self.timeout = getattr(settings, 'SESSION_TIMEOUT', 1800)
+        self.granularity = getattr(settings, 'SESSION_ACTIVITY_GRANULARITY', 60)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         if request.user.is_authenticated:
+            now = timezone.now().timestamp()
             # Retrieve the last activity timestamp from the session
             last_activity = request.session.get('last_activity')
-            
-            if last_activity:
-                # Calculate idle time in seconds
-                idle_time = timezone.now().timestamp() - last_activity
-                if idle_time > 1800:  # 30 minutes of inactivity
-                    logout(request)
-                    messages.info(request, 'Your session has expired.')
-                    request.session.flush()
-                    
-            # Update last activity timestamp when the user makes an action
-            request.session['last_activity'] = timezone.now().timestamp()
+
+            if last_activity and now - last_activity > self.timeout + self.granularity:
+                logout(request)
+                messages.info(request, 'Your session has expired.')
+                request.session.flush()
+
+            # Update last activity timestamp when the user makes an action,
+            # only if it moved enough to be worth a session write
+            elif not last_activity or now - last_activity >= self.granularity:
+                request.session['last_activity'] = now
 
         return self.get_response(request)
+
+    async def __acall__(self, request):
+        # A lazy request.user would query the database synchronously on first access
+        request.user = await request.auser()
+
+        if request.user.is_authenticated:
+            now = timezone.now().timestamp()
+            last_activity = await request.session.aget('last_activity')
+
+            if last_activity and now - last_activity > self.timeout + self.granularity:
+                # alogout() also flushes the session
+                await alogout(request)
+                # alogout() resets request.user, but auser() would still return the cached user
+                request._acached_user = request.user
+                messages.info(request, 'Your session has expired.')
+
+            elif not last_activity or now - last_activity >= self.granularity:
+                await request.session.aset('last_activity', now)
+
+        return await self.get_response(request)
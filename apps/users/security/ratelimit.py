@@ -0,0 +1,228 @@
+"""
+Sliding window rate limiting stored in Django's cache framework.
+
+Each identity (IP, user id, email...) costs two integer counters, the current and the
+previous fixed window, which expire on their own after two periods. The number of hits
+in the last period is estimated by weighting the previous window with the part of it
+that still overlaps the sliding window.
+
+A limit of one hit per period is an exact cooldown instead: a single key added with
+cache.add() when the hit is allowed, expiring one period later. The weighted estimate
+would otherwise block such a limit until the end of the next window, up to two periods.
+
+Counters are updated with cache.add() / cache.incr(), which are atomic on Memcached,
+Redis, LocMemCache and base.cache.sqlite.SQLiteCache. RATELIMIT_CACHE_ALIAS must point
+to a cache shared by every process for the limits to hold across workers, the
+users.E001 system check refuses a per-process one outside DEBUG.
+"""
+import hashlib
+import math
+import re
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import caches
+from django.shortcuts import redirect
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])')
+
+
+def parse_rate(rate):
+    """
+    Parse '<hits>/<period>' into (hits, seconds). The period is s, m, h or d
+    (or a longer spelling such as 'min' or 'hour'), optionally with a multiplier: '3/6h'.
+    """
+    match = RATE_RE.match(rate)
+    if match is None:
+        raise ValueError(f'Invalid rate: {rate!r}')
+    hits, multiplier, unit = match.groups()
+    return int(hits), int(multiplier or 1) * PERIODS[unit]
+
+
+def get_cache():
+    return caches[getattr(settings, 'RATELIMIT_CACHE_ALIAS', 'default')]
+
+
+def client_ip(request):
+    # REMOTE_ADDR only: X-Forwarded-For can be forged unless a trusted proxy rewrites it
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class RateLimit:
+    """
+    At most `rate` hits per identity, e.g. RateLimit('login', '10/m').hit(client_ip(request)).
+    """
+
+    def __init__(self, scope, rate):
+        self.scope = scope
+        self.limit, self.period = parse_rate(rate)
+
+    def cache_key(self, ident, window):
+        # Hashed so any identity (emails, IPv6...) makes a short, valid cache key
+        digest = hashlib.sha256(str(ident).encode()).hexdigest()[:32]
+        return f'rl:{self.scope}:{digest}:{window}'
+
+    def hit(self, ident):
+        """
+        Count a hit for the identity. Returns (allowed, retry_after): rejected hits are
+        not counted, retry_after is the number of seconds to wait before the next try.
+        """
+        cache = get_cache()
+        if self.limit == 1:
+            now = time.time()
+            key = self.cache_key(ident, 'cooldown')
+            if cache.add(key, now + self.period, self.period):
+                return True, 0
+            return self.cooldown_verdict(cache.get(key), now)
+
+        window, elapsed = divmod(time.time(), self.period)
+        current_key = self.cache_key(ident, int(window))
+
+        # Counters live two periods, long enough to serve as the previous window
+        cache.add(current_key, 0, self.period * 2)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.add(current_key, 1, self.period * 2)
+            current = 1
+        previous = cache.get(self.cache_key(ident, int(window) - 1), 0)
+
+        allowed, retry_after = self.verdict(current, previous, elapsed)
+        if not allowed:
+            try:
+                cache.decr(current_key)
+            except ValueError:
+                pass
+        return allowed, retry_after
+
+    async def ahit(self, ident):
+        """
+        hit() using the cache's async API, for async views.
+        """
+        cache = get_cache()
+        if self.limit == 1:
+            now = time.time()
+            key = self.cache_key(ident, 'cooldown')
+            if await cache.aadd(key, now + self.period, self.period):
+                return True, 0
+            return self.cooldown_verdict(await cache.aget(key), now)
+
+        window, elapsed = divmod(time.time(), self.period)
+        current_key = self.cache_key(ident, int(window))
+
+        await cache.aadd(current_key, 0, self.period * 2)
+        try:
+            current = await cache.aincr(current_key)
+        except ValueError:
+            await cache.aadd(current_key, 1, self.period * 2)
+            current = 1
+        previous = await cache.aget(self.cache_key(ident, int(window) - 1), 0)
+
+        allowed, retry_after = self.verdict(current, previous, elapsed)
+        if not allowed:
+            try:
+                await cache.adecr(current_key)
+            except ValueError:
+                pass
+        return allowed, retry_after
+
+    def verdict(self, current, previous, elapsed):
+        weight = 1 - elapsed / self.period
+        if previous * weight + current <= self.limit:
+            return True, 0
+
+        remaining = self.limit - current
+        if previous and remaining >= 0:
+            # The previous window fades out linearly, wait until enough of it is gone
+            retry_after = self.period * (1 - remaining / previous) - elapsed
+        else:
+            retry_after = self.period - elapsed
+        return False, max(1, math.ceil(retry_after))
+
+    def cooldown_verdict(self, expires_at, now):
+        # expires_at is None when the key expired between add() and get()
+        return False, max(1, math.ceil((expires_at or now) - now))
+
+    def reset(self, ident):
+        window = int(time.time() // self.period)
+        get_cache().delete_many([
+            self.cache_key(ident, window), self.cache_key(ident, window - 1), self.cache_key(ident, 'cooldown'),
+        ])
+
+
+def request_ident(request, key):
+    """
+    Identity of the request for a ratelimit key: 'ip', 'user' (falls back to the IP for
+    anonymous users), 'post:<field>' or a callable taking the request.
+    """
+    if callable(key):
+        return key(request)
+    if key == 'ip':
+        return client_ip(request)
+    if key == 'user':
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return client_ip(request)
+    if key.startswith('post:'):
+        value = request.POST.get(key[len('post:'):], '').strip().lower()
+        return value or None
+    raise ValueError(f'Unknown ratelimit key: {key!r}')
+
+
+def wait_message(retry_after):
+    minutes = math.ceil(retry_after / 60)
+    if minutes <= 1:
+        return 'Too many attempts. Please try again in a minute.'
+    return f'Too many attempts. Please try again in {minutes} minutes.'
+
+
+def ratelimit(scope, rate, key='ip', methods=('POST',)):
+    """
+    Limit a view to `rate` requests per identity. Over the limit the user is redirected
+    back to the page with a warning instead of running the view.
+
+        @ratelimit('login-ip', '20/m')
+        @ratelimit('login-username', '5/15m', key='post:username')
+        def login(request): ...
+
+    Works on sync and async views. With key='user', async views must have resolved
+    request.user before (SessionTimeoutMiddleware does).
+    """
+    limit = RateLimit(scope, rate)
+
+    def limited(request, retry_after):
+        messages.warning(request, wait_message(retry_after))
+        response = redirect(request.get_full_path())
+        response['Retry-After'] = str(retry_after)
+        return response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method in methods:
+                    ident = request_ident(request, key)
+                    if ident is not None:
+                        allowed, retry_after = await limit.ahit(ident)
+                        if not allowed:
+                            return limited(request, retry_after)
+                return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                ident = request_ident(request, key)
+                if ident is not None:
+                    allowed, retry_after = limit.hit(ident)
+                    if not allowed:
+                        return limited(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
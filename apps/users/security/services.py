@@ -1,19 +1,23 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.urls import reverse
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 
-import time
+import math
 from django.shortcuts import redirect
 from django.contrib import messages
 
 from django import forms
 
+from users.mail.queue import enqueue_mail
+
+from .ratelimit import RateLimit
+
 
 def send_verification_email(user, request):
     """
-    Generate a unique verification link for the user and send a verification email.
+    Generate a unique verification link for the user and queue the verification email.
+    The email is delivered by the `send_queued_mail` worker, so the request never waits on SMTP.
     """
     
     # Encode the user's ID into a base64 format
@@ -31,55 +35,39 @@ def send_verification_email(user, request):
     subject = 'Verify your email address'
     message = f'Click this link to verify your email: {verification_url}'
 
-    # Send the verification email
-    send_mail(
+    # Queue the verification email
+    enqueue_mail(
         subject,
         message,
         'noreply@yourdomain.com',  # Sender email address
         [user.email],  # Recipient email address
-        fail_silently=False,
     )
 
 
+# Per account: one resend every 3 minutes, and a longer wait after 3 resends in 6 hours.
+# Kept in the shared cache, so dropping the session cookie does not reset them.
+RESEND_COOLDOWN = RateLimit('resend-verification', '1/3m')
+RESEND_BURST = RateLimit('resend-verification-burst', '3/6h')
+
+
 def resend_verification_email_cooldown(request, user):
     """
     Resend the verification email with different cooldowns:
       - Standard cooldown: 3 minutes (for most requests)
-      - Extended cooldown: 6 hours (every 3rd request, after the first one)
+      - Extended cooldown: up to 6 hours once 3 emails were resent in the last 6 hours
     """
-    # If the user's mails_count is not zero and is a multiple of 3, use extended cooldown.
-    if user.mails_count > 0 and user.mails_count % 3 == 0:
-        cooldown = 21600  # 6 hours in seconds
-        
-    else:
-        cooldown = 180    # 3 minutes in seconds
-
-    session_key = 'last_verification_email_sent'
-    
-    # Get the last sent time from the session.
-    last_sent = request.session.get(session_key, 0)
-    try:
-        last_sent = int(last_sent)
-    except (ValueError, TypeError):
-        last_sent = 0
-
-    current_time = int(time.time())
-    
-    # Check if the required cooldown has passed.
-    if current_time - last_sent < cooldown:
-        wait_minutes = cooldown // 60
-        messages.warning(request, f'You must wait {wait_minutes} minutes before resending the email.')
-        return redirect('resend-verification')
+    for limit in (RESEND_COOLDOWN, RESEND_BURST):
+        allowed, retry_after = limit.hit(user.pk)
+        if not allowed:
+            wait_minutes = math.ceil(retry_after / 60)
+            messages.warning(request, f'You must wait {wait_minutes} minutes before resending the email.')
+            return redirect('resend-verification')
     
     # Send the verification email.
     send_verification_email(user, request)
     
-    # Increment the user's email send count.
-    user.mails_count += 1
-    user.save()
-    
-    # Update the session timestamp.
-    request.session['last_verification_email_sent'] = int(time.time())
+    # Increment the user's email send count (one atomic UPDATE of that column only).
+    user.increment_counter('mails_count')
     
     messages.success(request, 'Verification email sent successfully. Please check your inbox and spam folder.')
     return redirect('login')
@@ -0,0 +1,245 @@
+"""
+Session engine serving reads from a shared-memory cache and batching writes to the database.
+
+    SESSION_ENGINE = 'users.security.sessions'
+
+Reads come from the SESSION_CACHE_ALIAS cache, a bounded LRU in shared memory
+(base.cache.sqlite.SQLiteCache in /dev/shm) used by every worker process of the host,
+so no external cache service is needed. Updates that only change the session data (last_activity, flash messages...)
+are buffered and written to the database in batches by a background thread.
+
+Everything a session's security depends on is written through synchronously, to the
+database and the shared cache: new session keys (so they are unique, cycle_key() on
+login included) and changes of the authenticated user (login, logout). Deleting a
+session (logout, session.flush()) removes it from the database, the shared cache and
+the pending writes at once, so no worker keeps serving it. A marker left in the shared
+cache makes a buffered save of the deleted session, still loaded by a concurrent request,
+fail with UpdateError like Django's own engines do, instead of putting it back in the cache.
+
+Another host, or a worker reading the database before a batch is written, may see a
+buffered update up to SESSION_LOCAL_CACHE_TTL seconds late.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger('django.contrib.sessions')
+
+# Keys set by login() and removed by logout(), never left to the write-behind buffer
+AUTH_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+
+
+def auth_state(data):
+    return tuple(data.get(key) for key in AUTH_KEYS)
+
+
+class SessionWriteBuffer:
+    """
+    Pending session updates, keyed by session key so only the latest one is written.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def interval(self):
+        return getattr(settings, 'SESSION_WRITE_BEHIND_INTERVAL', 1)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'SESSION_WRITE_BEHIND_BATCH_SIZE', 500)
+
+    def add(self, model, session_key, session_data, expire_date, cache_key):
+        with self._lock:
+            self._pending[session_key] = (model, session_data, expire_date, cache_key)
+            full = len(self._pending) >= self.batch_size
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='session-write-behind', daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def discard(self, session_key):
+        with self._lock:
+            self._pending.pop(session_key, None)
+
+    def flush(self):
+        """
+        Write every pending update with one bulk UPDATE per model. Updates of sessions
+        deleted in the meantime (by another process) are dropped, with their cache entry.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        by_model = {}
+        for session_key, (model, session_data, expire_date, cache_key) in pending.items():
+            by_model.setdefault(model, []).append(
+                model(session_key=session_key, session_data=session_data, expire_date=expire_date)
+            )
+        try:
+            for model, sessions in by_model.items():
+                existing = set(
+                    model.objects.filter(session_key__in=[s.session_key for s in sessions])
+                    .values_list('session_key', flat=True)
+                )
+                deleted = [pending[s.session_key][3] for s in sessions if s.session_key not in existing]
+                if deleted:
+                    logger.debug('Dropping updates of %d deleted session(s)', len(deleted))
+                    caches[settings.SESSION_CACHE_ALIAS].delete_many(deleted)
+                sessions = [s for s in sessions if s.session_key in existing]
+                model.objects.bulk_update(sessions, ['session_data', 'expire_date'], batch_size=self.batch_size)
+        except DatabaseError:
+            logger.exception('Error writing %d buffered session(s), retrying later', len(pending))
+            with self._lock:
+                # Newer updates queued in the meantime win over the failed ones
+                for session_key, write in pending.items():
+                    self._pending.setdefault(session_key, write)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                # Don't keep a connection open per idle writer thread
+                connections.close_all()
+
+
+write_buffer = SessionWriteBuffer()
+atexit.register(write_buffer.flush)
+
+
+class SessionStore(CachedDBStore):
+    """
+    cached_db session store with write-behind updates and a bounded cache lifetime.
+    """
+
+    cache_key_prefix = 'users.security.sessions'
+
+    def get_cache_timeout(self, expiry=None):
+        return min(
+            self.get_expiry_age(expiry=expiry) if expiry else self.get_expiry_age(),
+            getattr(settings, 'SESSION_LOCAL_CACHE_TTL', 5),
+        )
+
+    def load(self):
+        try:
+            data = self._cache.get(self.cache_key)
+        except Exception:
+            data = None
+
+        if data is None:
+            s = self._get_session_from_db()
+            if s:
+                data = self.decode(s.session_data)
+                self._cache.set(self.cache_key, data, self.get_cache_timeout(expiry=s.expire_date))
+            else:
+                data = {}
+        self._stored_auth = auth_state(data)
+        return data
+
+    async def aload(self):
+        try:
+            data = await self._cache.aget(await self.acache_key())
+        except Exception:
+            data = None
+
+        if data is None:
+            s = await self._aget_session_from_db()
+            if s:
+                data = self.decode(s.session_data)
+                await self._cache.aset(
+                    await self.acache_key(), data, self.get_cache_timeout(expiry=s.expire_date)
+                )
+            else:
+                data = {}
+        self._stored_auth = auth_state(data)
+        return data
+
+    def must_write_through(self, must_create, data):
+        # New keys must be unique, and a login / logout must not wait in this process' buffer
+        return must_create or auth_state(data) != getattr(self, '_stored_auth', None)
+
+    def deleted_marker(self, session_key):
+        return f'{self.cache_key_prefix}{session_key}:deleted'
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+
+        data = self._get_session(no_load=must_create)
+        if self.must_write_through(must_create, data):
+            write_buffer.discard(self.session_key)
+            DBStore.save(self, must_create)
+            self._stored_auth = auth_state(data)
+            self._set_cache(data)
+            return
+
+        # Cache first, then look for the marker of delete(), which sets it before evicting:
+        # whatever the interleaving, a deleted session never stays in the cache
+        self._set_cache(data)
+        if self._cache.has_key(self.deleted_marker(self.session_key)):
+            self._cache.delete(self.cache_key)
+            raise UpdateError
+        write_buffer.add(self.model, self.session_key, self.encode(data), self.get_expiry_date(), self.cache_key)
+
+    async def asave(self, must_create=False):
+        if self.session_key is None:
+            return await self.acreate()
+
+        data = await self._aget_session(no_load=must_create)
+        if self.must_write_through(must_create, data):
+            write_buffer.discard(self.session_key)
+            await DBStore.asave(self, must_create)
+            self._stored_auth = auth_state(data)
+            await self._aset_cache(data)
+            return
+
+        await self._aset_cache(data)
+        if await self._cache.ahas_key(self.deleted_marker(self.session_key)):
+            await self._cache.adelete(self.cache_key)
+            raise UpdateError
+        write_buffer.add(
+            self.model, self.session_key, self.encode(data), await self.aget_expiry_date(), self.cache_key
+        )
+
+    def _set_cache(self, data):
+        try:
+            self._cache.set(self.cache_key, data, self.get_cache_timeout())
+        except Exception:
+            logger.exception('Error saving to cache (%s)', self._cache)
+
+    async def _aset_cache(self, data):
+        try:
+            await self._cache.aset(await self.acache_key(), data, self.get_cache_timeout())
+        except Exception:
+            logger.exception('Error saving to cache (%s)', self._cache)
+
+    def delete(self, session_key=None):
+        session_key = session_key or self.session_key
+        if session_key is not None:
+            # Kept as long as a request may still hold the session loaded
+            self._cache.set(self.deleted_marker(session_key), True, settings.SESSION_COOKIE_AGE)
+        write_buffer.discard(session_key)
+        super().delete(session_key)
+
+    async def adelete(self, session_key=None):
+        session_key = session_key or self.session_key
+        if session_key is not None:
+            await self._cache.aset(self.deleted_marker(session_key), True, settings.SESSION_COOKIE_AGE)
+        write_buffer.discard(session_key)
+        await super().adelete(session_key)
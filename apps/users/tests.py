@@ -1,3 +1,375 @@
-from django.test import TestCase
+import os
+import shutil
+import time
+from io import BytesIO, StringIO
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.base import UpdateError
+from django.core import mail
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import profile_key, profile_version
+from .checks import check_ratelimit_cache
+from .images.reaper import reaper
+from .management.commands.collect_orphan_images import Command
+from .mail.queue import claim_due_messages, enqueue_mail, retry_delay, send_pending
+from .models import OutboundEmail, User
+from .security.backends import PooledModelBackend
+from .security.ratelimit import RateLimit
+from .security.sessions import SessionStore, write_buffer
+
+class UsersTestCase(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def create_user(self, username='alice', password='secret-pw-1', **fields):
+        fields.setdefault('email', f'{username}@example.com')
+        fields.setdefault('is_verified', True)
+        return User.objects.create_user(username, password=password, **fields)
+
+class LoginTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_user()
+
+    def test_login_authenticates_asynchronously(self):
+        with mock.patch.object(PooledModelBackend, 'authenticate', side_effect=AssertionError):
+            response = self.client.post('/login/', {'username': 'alice', 'password': 'secret-pw-1'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(SESSION_KEY, self.client.session)
+
+    def test_wrong_password_is_refused(self):
+        response = self.client.post('/login/', {'username': 'alice', 'password': 'wrong-pw-1'})
+
+        self.assertContains(response, 'Invalid username or password')
+        self.assertNotIn(SESSION_KEY, self.client.session)
+
+class SessionEngineTests(UsersTestCase):
+    """
+    users.security.sessions: what another worker process sees, i.e. the database once
+    the shared cache entry is gone, or the shared cache itself.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+        self.addCleanup(write_buffer.flush)
+
+    def log_in(self):
+        response = self.client.post('/login/', {'username': 'alice', 'password': 'secret-pw-1'})
+        self.assertEqual(response.status_code, 302)
+        return self.client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def test_login_is_written_through_to_the_database(self):
+        self.log_in()
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+
+        response = self.client.get('/alice/')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_activity_updates_are_buffered(self):
+        session_key = self.log_in()
+        session = SessionStore(session_key)
+        session['last_activity'] = 1.0
+        session.save()
+
+        self.assertNotIn('last_activity', SessionStore().decode(
+            SessionStore.get_model_class().objects.get(session_key=session_key).session_data
+        ))
+        self.assertEqual(SessionStore(session_key)['last_activity'], 1.0)
+        write_buffer.flush()
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        self.assertEqual(SessionStore(session_key)['last_activity'], 1.0)
+
+    def test_logout_removes_the_session_for_every_worker(self):
+        session_key = self.log_in()
+        self.assertTrue(SessionStore(session_key).load())
+
+        self.client.get('/logout/')
+
+        self.assertIsNone(caches[settings.SESSION_CACHE_ALIAS].get(SessionStore(session_key).cache_key))
+        self.assertEqual(SessionStore(session_key).load(), {})
+
+    def test_timeout_flush_removes_the_session_for_every_worker(self):
+        session_key = self.log_in()
+        session = SessionStore(session_key)
+        session['last_activity'] = (timezone.now().timestamp() - settings.SESSION_TIMEOUT
+                                    - settings.SESSION_ACTIVITY_GRANULARITY - 1)
+        session.save()
+
+        response = self.client.get('/alice/')
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(SessionStore(session_key).load(), {})
+        self.assertEqual(self.client.get('/alice/').status_code, 302)
+
+    def test_active_session_is_not_timed_out_early(self):
+        session_key = self.log_in()
+        # The stored timestamp lags the last request by up to the granularity
+        session = SessionStore(session_key)
+        session['last_activity'] = timezone.now().timestamp() - settings.SESSION_TIMEOUT - 1
+        session.save()
+
+        self.assertEqual(self.client.get('/alice/').status_code, 200)
+        self.assertGreater(SessionStore(session_key)['last_activity'], timezone.now().timestamp() - 5)
+
+    def test_buffered_save_of_a_deleted_session_fails(self):
+        session_key = self.log_in()
+        # Worker 2 has the session loaded while worker 1 logs it out
+        worker2 = SessionStore(session_key)
+        self.assertIn('_auth_user_id', worker2)
+        SessionStore(session_key).flush()
+
+        worker2['last_activity'] = 1.0
+        with self.assertRaises(UpdateError):
+            worker2.save()
+
+        self.assertIsNone(caches[settings.SESSION_CACHE_ALIAS].get(worker2.cache_key))
+        self.assertEqual(SessionStore(session_key).load(), {})
+
+    def test_write_behind_drops_updates_of_deleted_sessions(self):
+        session_key = self.log_in()
+        session = SessionStore(session_key)
+        session['last_activity'] = 1.0
+        session.save()
+        # Deleted by another process: this process' buffer still holds the update
+        SessionStore.get_model_class().objects.filter(session_key=session_key).delete()
+
+        write_buffer.flush()
+
+        self.assertIsNone(caches[settings.SESSION_CACHE_ALIAS].get(session.cache_key))
+        self.assertEqual(SessionStore(session_key).load(), {})
+
+class ProfilePageTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = self.create_user('alice', first_name='Alice')
+        self.create_user('bob')
+
+    def test_cached_owner_holds_only_the_rendered_columns(self):
+        self.client.login(username='bob', password='secret-pw-1')
+
+        response = self.client.get('/alice/')
+
+        self.assertContains(response, 'Alice')
+        owner = caches['default'].get(profile_key('owner', 'alice', profile_version('alice')))
+        self.assertEqual(owner.pk, self.alice.pk)
+        self.assertLessEqual({'password', 'email', 'is_staff', 'mails_count'}, owner.get_deferred_fields())
+
+    def test_owner_is_sent_to_the_update_page(self):
+        self.client.login(username='alice', password='secret-pw-1')
+        self.client.get('/alice/')
+
+        response = self.client.post('/alice/')
+
+        self.assertRedirects(response, reverse('update_user'), fetch_redirect_response=False)
+
+def image_upload(color, name='photo.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (200, 200), color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+@override_settings(PROFILE_IMAGE_REAPER_INTERVAL=3600)
+class ProfileImageReaperTests(UsersTestCase):
+    """
+    Replaced profile images are deleted by the reaper, unless they are used again meanwhile.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT, ignore_errors=True)
+        self.alice = self.create_user('alice', profile_image=image_upload('red'))
+        self.bob = self.create_user('bob')
+        self.storage = self.alice.profile_image.storage
+
+    def replace_alice_image(self):
+        old_name = self.alice.profile_image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.profile_image = image_upload('blue')
+            self.alice.save()
+        return old_name
+
+    def test_replaced_image_is_deleted(self):
+        old_name = self.replace_alice_image()
+
+        reaper.flush()
+
+        self.assertFalse(self.storage.exists(old_name))
+
+    def test_upload_of_the_same_content_keeps_the_file(self):
+        old_name = self.replace_alice_image()
+        self.bob.profile_image = image_upload('red', name='other.png')
+        self.bob.save()
+
+        reaper.flush()
+
+        self.assertEqual(self.bob.profile_image.name, old_name)
+        self.assertTrue(self.storage.exists(old_name))
+
+    def test_file_referenced_again_before_the_deletion_is_kept(self):
+        old_name = self.replace_alice_image()
+        # Another process pointed a row at the file while its deletion was queued
+        User.objects.filter(pk=self.bob.pk).update(profile_image=old_name)
+
+        reaper.flush()
+
+        self.assertTrue(self.storage.exists(old_name))
+
+class CollectOrphanImagesTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT, ignore_errors=True)
+        self.alice = self.create_user('alice', profile_image=image_upload('red'))
+        self.storage = self.alice.profile_image.storage
+        self.name = self.alice.profile_image.name
+        self.alice.profile_image = None
+        self.alice.save()
+        self.age(self.name)
+
+    def age(self, name):
+        path = self.storage.path(name)
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+
+    def collect(self):
+        call_command('collect_orphan_images', stdout=StringIO())
+
+    def test_old_orphan_is_deleted(self):
+        self.collect()
+
+        self.assertFalse(self.storage.exists(self.name))
+
+    def test_deduplicated_upload_refreshes_the_file(self):
+        bob = self.create_user('bob', profile_image=image_upload('red', name='other.png'))
+        self.assertEqual(bob.profile_image.name, self.name)
+        # Uploaded, but the row isn't saved yet when the walk runs
+        User.objects.filter(pk=bob.pk).update(profile_image='')
+
+        self.collect()
+
+        self.assertTrue(self.storage.exists(self.name))
+
+    def test_file_referenced_during_the_walk_is_kept(self):
+        walk = Command.walk
+
+        def walk_then_reference(command, storage, path):
+            yield from walk(command, storage, path)
+            User.objects.filter(pk=self.alice.pk).update(profile_image=self.name)
+
+        with mock.patch.object(Command, 'walk', walk_then_reference):
+            self.collect()
+
+        self.assertTrue(self.storage.exists(self.name))
+
+@override_settings(MAIL_QUEUE_RETRY_BACKOFF=60, MAIL_QUEUE_MAX_BACKOFF=3600, MAIL_QUEUE_MAX_ATTEMPTS=3,
+                   MAIL_QUEUE_LEASE=300)
+class MailQueueTests(UsersTestCase):
+    """
+    users.mail.queue: delivery by send_pending, retries with backoff, leases.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.queued = enqueue_mail('Verify', 'Body', 'noreply@localhost', ['alice@example.com'])
+
+    def make_due(self):
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+
+    def test_queued_mail_is_sent(self):
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(send_pending(), (1, 0))
+
+        self.assertEqual([message.to for message in mail.outbox], [['alice@example.com']])
+        self.queued.refresh_from_db()
+        self.assertEqual(self.queued.status, OutboundEmail.STATUS_SENT)
+        self.assertEqual(send_pending(), (0, 0))
+
+    def test_failed_send_is_retried_with_backoff(self):
+        with mock.patch('users.mail.queue.EmailMessage.send', side_effect=SMTPException('down')):
+            start = timezone.now()
+            self.assertEqual(send_pending(), (0, 1))
+            self.queued.refresh_from_db()
+            self.assertEqual((self.queued.status, self.queued.attempts), (OutboundEmail.STATUS_PENDING, 1))
+            self.assertEqual(self.queued.last_error, 'down')
+            self.assertAlmostEqual((self.queued.next_attempt_at - start).total_seconds(), 60, delta=5)
+            # Not due before the backoff is over
+            self.assertEqual(send_pending(), (0, 0))
+
+            self.make_due()
+            start = timezone.now()
+            send_pending()
+            self.queued.refresh_from_db()
+            self.assertAlmostEqual((self.queued.next_attempt_at - start).total_seconds(), 120, delta=5)
+
+            self.make_due()
+            send_pending()
+            self.queued.refresh_from_db()
+            self.assertEqual((self.queued.status, self.queued.attempts), (OutboundEmail.STATUS_FAILED, 3))
+
+        self.make_due()
+        self.assertEqual(send_pending(), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual([retry_delay(attempts).total_seconds() for attempts in [1, 2, 3, 7, 20]],
+                         [60, 120, 240, 3600, 3600])
+
+    def test_unreachable_server_fails_the_whole_batch(self):
+        enqueue_mail('Verify', 'Body', 'noreply@localhost', ['bob@example.com'])
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open', side_effect=OSError('refused')):
+            self.assertEqual(send_pending(), (0, 2))
+
+        self.assertEqual(set(OutboundEmail.objects.values_list('attempts', flat=True)), {1})
+
+    def test_claimed_messages_are_leased(self):
+        start = timezone.now()
+
+        self.assertEqual(claim_due_messages(10), [self.queued])
+        # Another worker, or this one after a crash, can't take them before the lease ends
+        self.assertEqual(claim_due_messages(10), [])
+        self.queued.refresh_from_db()
+        self.assertAlmostEqual((self.queued.next_attempt_at - start).total_seconds(), 300, delta=5)
+
+        self.make_due()
+        self.assertEqual(claim_due_messages(10), [self.queued])
+
+class RateLimitTests(UsersTestCase):
+    def test_one_hit_per_period_is_an_exact_cooldown(self):
+        limit = RateLimit('test-cooldown', '1/3m')
+        now = time.time()
+
+        with mock.patch('time.time', return_value=now):
+            self.assertEqual(limit.hit('alice'), (True, 0))
+        with mock.patch('time.time', return_value=now + 60):
+            self.assertEqual(limit.hit('alice'), (False, 120))
+        with mock.patch('time.time', return_value=now + 181):
+            self.assertEqual(limit.hit('alice'), (True, 0))
+
+    def test_per_process_cache_fails_the_system_check(self):
+        locmem = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
+        with override_settings(CACHES={**settings.CACHES, 'ratelimit': locmem}, DEBUG=False):
+            self.assertEqual([error.id for error in check_ratelimit_cache(None)], ['users.E001'])
+        with override_settings(CACHES={**settings.CACHES, 'ratelimit': locmem}, DEBUG=True):
+            self.assertEqual(check_ratelimit_cache(None), [])
+        self.assertEqual(check_ratelimit_cache(None), [])
+
+    def test_sliding_window_limit(self):
+        limit = RateLimit('test-window', '3/m')
+
+        self.assertEqual([limit.hit('alice')[0] for _ in range(4)], [True, True, True, False])
+        self.assertTrue(limit.hit('bob')[0])
@@ -1,12 +1,12 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, aget_object_or_404
 
 # Authentication
-from django.contrib.auth import login as auth_login, logout ,update_session_auth_hash
+from django.contrib.auth import alogin, logout ,update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 
 # Forms
-from django.contrib.auth.forms import AuthenticationForm
-from .forms import Signup_Form, Resend_Verification_Email_Form, UserUpdateForm
+from .forms import Login_Form, Signup_Form, Resend_Verification_Email_Form, UserUpdateForm
 
 # Messages
 from django.contrib import messages
@@ -15,25 +15,36 @@ from django.contrib import messages
 from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
 from django.contrib.auth.tokens import default_token_generator
-from django.contrib.auth.hashers import make_password
+from .security.hashing import ahash_password
 
 # Models
 from .models import User
+from .cache import PROFILE_OWNER_FIELDS, aprofile_version, aget_profile_owner, profile_cache_timeout
 
 # Services
 from .security.services import send_verification_email, resend_verification_email_cooldown
+from .security.ratelimit import ratelimit
 
 
-def main(request):
+async def arender(request, template_name, context):
+    """
+    render() for async views. Templates read request.user (nav bar), which must not be
+    loaded lazily from the database inside the event loop, so it is resolved first.
+    """
+    request.user = await request.auser()
+    return render(request, template_name, context)
+
+
+async def main(request):
     """
     Render the main landing page.
     """
-    return render(request, 'main.html', {
+    return await arender(request, 'main.html', {
         'name': "main"
     })
 
 
-def verify_email(request, uidb64, token):
+async def verify_email(request, uidb64, token):
     """
     Verify the user's email address.
 
@@ -45,14 +56,14 @@ def verify_email(request, uidb64, token):
         # Decode the base64-encoded user ID to obtain the actual ID.
         uid = force_str(urlsafe_base64_decode(uidb64))
         # Retrieve the user based on the decoded ID.
-        user = User.objects.get(pk=uid)
+        user = await User.objects.aget(pk=uid)
         
         # Verify that the token is valid for the retrieved user.
         if default_token_generator.check_token(user, token):
             user.is_verified = True
             user.is_active = True
             # Save the changes to the user model.
-            user.save()
+            await user.asave()
             messages.success(request, 'Email verified successfully!')
             return redirect('login')
         else:
@@ -65,7 +76,8 @@ def verify_email(request, uidb64, token):
         return redirect('main')
 
 
-def resend_verification_email(request):
+@ratelimit('resend-verification-ip', '10/h')
+async def resend_verification_email(request):
     """
     Allow users to request a new verification email.
 
@@ -74,7 +86,7 @@ def resend_verification_email(request):
           and enforce a cooldown on resend attempts.
     """
     if request.method == 'GET':
-        return render(request, 'resend_verification.html', {
+        return await arender(request, 'resend_verification.html', {
             'form': Resend_Verification_Email_Form(),
             'name': "resend email"
         })
@@ -83,16 +95,16 @@ def resend_verification_email(request):
 
         if not email:
             messages.error(request, 'Please provide an email address.')
-            return render(request, 'resend_verification.html', {
+            return await arender(request, 'resend_verification.html', {
                 'form': Resend_Verification_Email_Form(),
                 'name': "resend email"
             })
     
         try:
-            user = User.objects.get(email=email)
+            user = await User.objects.aget(email=email)
         except User.DoesNotExist:
             messages.error(request, 'This email is not registered.')
-            return render(request, 'resend_verification.html', {
+            return await arender(request, 'resend_verification.html', {
                 'form': Resend_Verification_Email_Form(),
                 'name': "resend email"
             })
@@ -102,11 +114,11 @@ def resend_verification_email(request):
             return redirect('login')
         
         # Enforce the cooldown for resend attempts.
-        resend_verification_email_cooldown(request, user)
-        return redirect('login')
+        return await sync_to_async(resend_verification_email_cooldown)(request, user)
 
 
-def signup(request):
+@ratelimit('signup-ip', '5/h')
+async def signup(request):
     """
     Handle user signup.
 
@@ -115,21 +127,22 @@ def signup(request):
           set the account as inactive until email verification, and send the verification email.
     """
     if request.method == 'GET':
-        return render(request, 'signup.html', {
+        return await arender(request, 'signup.html', {
             'form': Signup_Form(),
             'name': "sign up",
         })
     else:
         form = Signup_Form(request.POST, request.FILES)
-        if form.is_valid():
+        # Validation runs uniqueness queries, forms have no async API
+        if await sync_to_async(form.is_valid)():
             user = form.save(commit=False)  # Do not immediately save the user to the database.
-            user.password = make_password(form.cleaned_data['password1'])  # Hash the password.
+            user.password = await ahash_password(form.cleaned_data['password1'])  # Hash the password in the worker pool.
             user.is_verified = False  # Set the user as unverified.
             user.is_active = False # Set the user as inactive until email verification.
-            user.save()  # Save the new user to the database.
+            await user.asave()  # Save the new user to the database.
 
             # Send a verification email to the new user.
-            send_verification_email(user, request)
+            await sync_to_async(send_verification_email)(user, request)
 
             messages.success(
                 request,
@@ -137,13 +150,15 @@ def signup(request):
             )
             return redirect('login')  # Redirect the user to the login page.
         else:
-            return render(request, 'signup.html', {
+            return await arender(request, 'signup.html', {
                 'form': form,
                 'name': "sign up",
             })
 
 
-def login(request):
+@ratelimit('login-ip', '20/m')
+@ratelimit('login-username', '5/15m', key='post:username')
+async def login(request):
     """
     Authenticate and log in the user.
 
@@ -152,29 +167,30 @@ def login(request):
           before allowing login.
     """
     if request.method == 'GET':
-        return render(request, 'login.html', {
-            'form': AuthenticationForm(),
+        return await arender(request, 'login.html', {
+            'form': Login_Form(),
             'name': "log in"
         })
     else:
-        form = AuthenticationForm(request, data=request.POST)
-        if form.is_valid():
+        form = Login_Form(request, data=request.POST)
+        # Authenticates with aauthenticate(), the password is checked in the worker pool
+        if await form.ais_valid():
             user = form.get_user()
 
             # Check that the user's email is verified.
             if not user.is_verified:
                 messages.error(request, 'Please verify your email address first.')
-                return render(request, 'login.html', {
+                return await arender(request, 'login.html', {
                     'form': form,
                     'name': "log in"
                 })
             else:
-                auth_login(request, user)
+                await alogin(request, user)
                 messages.success(request, f'Welcome back, {user.username}!')
                 return redirect('main')
         else:
             error = "Invalid username or password. Please try again."
-            return render(request, 'login.html', {
+            return await arender(request, 'login.html', {
                 'form': form, 
                 'error': error,
                 'name': "log in"
@@ -195,30 +211,40 @@ def log_out(request):
 
 
 @login_required
-def user_profile(request, user_name):
+async def user_profile(request, user_name):
     """
     Render the user profile and pass the user's profile information to the template.
 
     GET: Display the user's profile information.
     POST: If the viewer is the profile owner, redirect to the update view; otherwise, show an error message.
+
+    The owner and the owner sections of the page are cached per username and profile
+    version (users.cache), the viewer specific parts are rendered on every request.
     """
-    viewer = request.user
-    user_owner = get_object_or_404(User, username=user_name)
+    viewer = await request.auser()
+    version = await aprofile_version(user_name)
+    user_owner = await aget_profile_owner(
+        user_name, version, lambda: aget_object_or_404(User.objects.only(*PROFILE_OWNER_FIELDS), username=user_name)
+    )
     if request.method == 'GET':
-        return render(request, 'profile.html', {
+        return await arender(request, 'profile.html', {
             'user_owner': user_owner,
             'user_viewer': viewer,
             'name': user_owner.username,
+            'profile_version': version,
+            'profile_cache_timeout': profile_cache_timeout(),
         })
     else:
-        if viewer == user_owner:
+        if viewer.pk == user_owner.pk:
             return redirect('update_user')
         else:
             messages.error(request, 'You are not the profile owner.')
-            return render(request, 'profile.html', {
+            return await arender(request, 'profile.html', {
                 'user_owner': user_owner,
                 'user_viewer': viewer,
                 'name': user_owner.username,
+                'profile_version': version,
+                'profile_cache_timeout': profile_cache_timeout(),
             })
 
 
@@ -0,0 +1,167 @@
+"""
+Cache backend shared by the processes of a host, stored in one SQLite file.
+
+    'BACKEND': 'base.cache.sqlite.SQLiteCache',
+    'LOCATION': '/dev/shm/django-sessions.sqlite3',
+    'OPTIONS': {'MAX_ENTRIES': 10000, 'CULL_FREQUENCY': 10},
+
+Put the file on tmpfs (/dev/shm on Linux) and the cache lives in shared memory: every
+worker process reads and writes the same entries, no cache service needed. Lookups go
+through the primary key, the entry count is kept by triggers, and when MAX_ENTRIES is
+exceeded the expired entries, then the least recently used ones (1/CULL_FREQUENCY of
+MAX_ENTRIES), are evicted through an index. No operation scans the whole cache.
+
+add(), incr() and decr() run in an IMMEDIATE transaction, so they are atomic across
+processes, as rate limit counters need.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_used ON cache (used);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+CREATE TABLE IF NOT EXISTS cache_size (entries INTEGER NOT NULL);
+INSERT INTO cache_size SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM cache_size);
+CREATE TRIGGER IF NOT EXISTS cache_inserted AFTER INSERT ON cache
+    BEGIN UPDATE cache_size SET entries = entries + 1; END;
+CREATE TRIGGER IF NOT EXISTS cache_deleted AFTER DELETE ON cache
+    BEGIN UPDATE cache_size SET entries = entries - 1; END;
+"""
+
+# Reads record their access time at most this often per entry, so most reads don't write
+TOUCH_INTERVAL = 1
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # A forked child must not use its parent's connection
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=10, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode = WAL')
+            # The file is a cache on tmpfs, losing it on a crash is fine
+            connection.execute('PRAGMA synchronous = OFF')
+            connection.executescript(f'BEGIN IMMEDIATE; {SCHEMA} COMMIT;')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _read(self, connection, key, now):
+        # (value, expires) of a live entry, None when missing or expired
+        row = connection.execute('SELECT value, expires, used FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires, used = row
+        if expires is not None and expires <= now:
+            connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+            return None
+        if now - used > TOUCH_INTERVAL:
+            connection.execute('UPDATE cache SET used = ? WHERE key = ?', (now, key))
+        return pickle.loads(value), expires
+
+    def _write(self, connection, key, value, expires, now):
+        connection.execute(
+            'INSERT INTO cache (key, value, expires, used) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, used = excluded.used',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires, now),
+        )
+        (entries,) = connection.execute('SELECT entries FROM cache_size').fetchone()
+        if entries > self._max_entries:
+            self._cull(connection, entries, now)
+
+    def _cull(self, connection, entries, now):
+        entries -= connection.execute('DELETE FROM cache WHERE expires <= ?', (now,)).rowcount
+        if entries > self._max_entries:
+            count = entries - self._max_entries + self._max_entries // self._cull_frequency
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY used LIMIT ?)', (count,)
+            )
+
+    def _transaction(self, function, *args):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = function(connection, *args)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expires = self.get_backend_timeout(timeout)
+
+        def add(connection):
+            now = time.time()
+            if self._read(connection, key, now) is not None:
+                return False
+            self._write(connection, key, value, expires, now)
+            return True
+        return self._transaction(add)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # Autocommit: reads don't take the write lock, unless they expire or touch the entry
+        entry = self._read(self._connection(), key, time.time())
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._transaction(self._write, key, value, self.get_backend_timeout(timeout), time.time())
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+
+        def incr(connection):
+            now = time.time()
+            entry = self._read(connection, key, now)
+            if entry is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = entry[0] + delta
+            self._write(connection, key, value, entry[1], now)
+            return value
+        return self._transaction(incr)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Connections stay open for the life of the thread, like LocMemCache's dict
+        pass
@@ -0,0 +1,57 @@
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .sqlite import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = SQLiteCache(f'{directory.name}/cache.sqlite3', {
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 5},
+        })
+
+    def test_get_set_delete(self):
+        self.cache.set('key', {'a': 1})
+
+        self.assertEqual(self.cache.get('key'), {'a': 1})
+        self.assertTrue(self.cache.has_key('key'))
+        self.assertTrue(self.cache.delete('key'))
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_entries_expire(self):
+        self.cache.set('key', 1, timeout=10)
+
+        with mock.patch('time.time', return_value=time.time() + 11):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 2))
+
+    def test_add_and_incr(self):
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 5))
+
+        self.assertEqual(self.cache.incr('counter'), 2)
+        self.assertEqual(self.cache.decr('counter'), 1)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_least_recently_used_entries_are_evicted(self):
+        now = time.time()
+        for i in range(10):
+            with mock.patch('time.time', return_value=now + i * 2):
+                self.cache.set(f'key{i}', i)
+        # Read again, key0 is now the most recently used entry
+        with mock.patch('time.time', return_value=now + 30):
+            self.cache.get('key0')
+            self.cache.set('key10', 10)
+
+        # Back to MAX_ENTRIES minus 1/CULL_FREQUENCY of it: 8 entries
+        self.assertEqual(self.cache.get('key0'), 0)
+        for i in (1, 2, 3):
+            self.assertIsNone(self.cache.get(f'key{i}'))
+        self.assertEqual(self.cache.get('key4'), 4)
+        self.assertEqual(self.cache.get('key10'), 10)
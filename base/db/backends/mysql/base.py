@@ -0,0 +1,16 @@
+"""
+MySQL / MariaDB backend with a connection pool, see base/db/pool.py.
+
+    'ENGINE': 'base.db.backends.mysql',
+    'POOL': {'MIN_SIZE': 2, 'MAX_SIZE': 10},
+"""
+from django.db.backends.mysql import base as mysql
+
+from base.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, mysql.DatabaseWrapper):
+
+    def ping_connection(self, connection):
+        # One round trip, no statement to parse
+        connection.ping()
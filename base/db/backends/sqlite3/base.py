@@ -0,0 +1,15 @@
+"""
+SQLite backend with a connection pool, see base/db/pool.py. Used to run and benchmark
+the pool without MariaDB; only useful with a database file, an in-memory database is
+never closed by Django anyway.
+
+    'ENGINE': 'base.db.backends.sqlite3',
+    'POOL': {'MAX_SIZE': 4},
+"""
+from django.db.backends.sqlite3 import base as sqlite3
+
+from base.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, sqlite3.DatabaseWrapper):
+    pass
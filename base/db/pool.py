@@ -0,0 +1,287 @@
+"""
+Process-wide database connection pool, used by the backends in base/db/backends.
+
+Django opens one connection per thread and, with CONN_MAX_AGE = 0, closes it at the
+end of every request. The pooled backends hand out an already open connection instead
+and take it back on close(), so threads (threaded WSGI workers, the threads used by
+sync_to_async under ASGI) share a bounded set of connections.
+
+Enabled per database with a top-level POOL key, the ENGINE being one of the backends
+of base.db.backends:
+
+    'POOL': {
+        'MIN_SIZE': 2,  # Idle connections kept open, the extra ones are closed after MAX_IDLE
+        'MAX_SIZE': 10,  # Connections open at once, checkouts over it wait
+        'TIMEOUT': 10,  # Seconds a checkout waits for a connection before failing
+        'PING_INTERVAL': 30,  # Connections idle for longer are pinged before reuse
+        'MAX_IDLE': 300,  # Seconds before an idle connection above MIN_SIZE is closed
+        'MAX_LIFETIME': 3600,  # Seconds before a connection is replaced (server wait_timeout)
+    }
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+logger = logging.getLogger('django.db.backends')
+
+DEFAULTS = {
+    'MIN_SIZE': 2,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'PING_INTERVAL': 30,
+    'MAX_IDLE': 300,
+    'MAX_LIFETIME': 3600,
+}
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections. Thread safe, checkouts over MAX_SIZE wait up
+    to TIMEOUT seconds for a connection to be released.
+    """
+
+    def __init__(self, alias, options):
+        options = {**DEFAULTS, **options}
+        self.alias = alias
+        self.min_size = options['MIN_SIZE']
+        self.max_size = options['MAX_SIZE']
+        self.timeout = options['TIMEOUT']
+        self.ping_interval = options['PING_INTERVAL']
+        self.max_idle = options['MAX_IDLE']
+        self.max_lifetime = options['MAX_LIFETIME']
+
+        self._cond = threading.Condition()
+        # (connection, created_at, released_at), most recently released last
+        self._idle = deque()
+        self._created_at = {}
+        # id(connection) -> (connection, thread that checked it out)
+        self._in_use = {}
+        self._size = 0
+        self._stats = {
+            'created': 0, 'closed': 0, 'checkouts': 0, 'reused': 0, 'reclaimed': 0,
+            'timeouts': 0, 'failed_pings': 0, 'wait_seconds': 0.0,
+        }
+
+    def acquire(self, connect, ping):
+        """
+        Return an open connection, reusing an idle one when possible.
+        connect() opens a new connection, ping(connection) raises if it is dead.
+
+        The connection belongs to the calling thread until release(). If the thread
+        exits without releasing it, it is reclaimed once the pool runs out of connections.
+        """
+        connection = self._checkout(connect, ping)
+        with self._cond:
+            self._in_use[id(connection)] = (connection, threading.current_thread())
+        return connection
+
+    def _checkout(self, connect, ping):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                if self._reclaim():
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"No connection available in the '{self.alias}' pool after {self.timeout}s "
+                        f"({self.max_size} in use)."
+                    )
+                # Threads that exit don't notify, look for connections to reclaim every second
+                self._cond.wait(min(remaining, 1))
+
+            self._stats['checkouts'] += 1
+            self._stats['wait_seconds'] += time.monotonic() - start
+            if self._idle:
+                # LIFO: the least recently used connections stay idle and expire
+                connection, created_at, released_at = self._idle.pop()
+            else:
+                connection = None
+                self._size += 1
+
+        if connection is None:
+            return self._open(connect)
+
+        now = time.monotonic()
+        if now - created_at > self.max_lifetime:
+            # Replaced in the same slot
+            self._close(connection)
+            return self._open(connect)
+        if now - released_at > self.ping_interval:
+            try:
+                ping(connection)
+            except Exception:
+                with self._cond:
+                    self._stats['failed_pings'] += 1
+                self._close(connection)
+                return self._open(connect)
+
+        with self._cond:
+            self._stats['reused'] += 1
+        return connection
+
+    def release(self, connection, broken=False):
+        """
+        Give a connection back. Broken or expired connections are closed instead.
+        """
+        with self._cond:
+            if self._in_use.pop(id(connection), None) is None:
+                # Already reclaimed, and closed, after its thread exited
+                return
+
+        now = time.monotonic()
+        created_at = self._created_at.get(id(connection), now)
+        if broken or now - created_at > self.max_lifetime:
+            self._discard(connection)
+            return
+
+        with self._cond:
+            self._idle.append((connection, created_at, now))
+            expired = []
+            # Shrink back towards MIN_SIZE, oldest idle connections first
+            while self._idle and self._size - len(expired) > self.min_size and now - self._idle[0][2] > self.max_idle:
+                expired.append(self._idle.popleft()[0])
+            self._cond.notify()
+        for connection in expired:
+            self._discard(connection)
+
+    def stats(self):
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                **self._stats,
+                'avg_wait_ms': self._stats['wait_seconds'] * 1000 / checkouts if checkouts else 0.0,
+            }
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, deque()
+        for connection, _, _ in idle:
+            self._discard(connection)
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created_at[id(connection)] = time.monotonic()
+            self._stats['created'] += 1
+        return connection
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            logger.debug("Error closing a pooled connection of '%s'", self.alias, exc_info=True)
+        with self._cond:
+            self._created_at.pop(id(connection), None)
+            self._stats['closed'] += 1
+
+    def _reclaim(self):
+        # Called with the lock held: free the slots of connections whose thread exited
+        # without releasing them (a thread that never called connection.close())
+        dead = [connection for connection, thread in self._in_use.values() if not thread.is_alive()]
+        for connection in dead:
+            del self._in_use[id(connection)]
+            self._stats['reclaimed'] += 1
+            logger.warning(
+                "Reclaimed a connection of the '%s' pool from a thread that exited without closing it", self.alias
+            )
+            self._discard(connection)
+        return len(dead)
+
+    def _discard(self, connection):
+        # Close the connection and free its slot
+        self._close(connection)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(alias, options)
+        return pool
+
+
+def stats():
+    """
+    Metrics of every pool of this process, by database alias.
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+def _reset_after_fork():
+    # Children must not share sockets with their parent, they start with empty pools
+    global _pools_lock
+    _pools_lock = threading.Lock()
+    _pools.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Mixin for a backend's DatabaseWrapper taking connections from the pool of its alias
+    instead of opening one, and giving them back on close().
+    """
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire(
+            lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params),
+            self.ping_connection,
+        )
+
+    def ping_connection(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        broken = False
+        try:
+            # Never hand over a connection in the middle of a transaction
+            if self.in_atomic_block or not self.autocommit:
+                self.connection.rollback()
+        except Exception:
+            broken = True
+        if self.errors_occurred and not broken:
+            broken = not self.is_usable()
+        self.pool.release(self.connection, broken=broken)
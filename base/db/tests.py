@@ -0,0 +1,64 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from .pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def ping(connection):
+    pass
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.pool = ConnectionPool('default', {'MIN_SIZE': 1, 'MAX_SIZE': 3, 'TIMEOUT': 0.1})
+
+    def acquire_in_thread(self):
+        connections = []
+        thread = threading.Thread(target=lambda: connections.append(self.pool.acquire(FakeConnection, ping)))
+        thread.start()
+        thread.join()
+        return connections[0]
+
+    def test_checkouts_over_max_size_time_out(self):
+        for _ in range(3):
+            self.pool.acquire(FakeConnection, ping)
+
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire(FakeConnection, ping)
+
+    def test_released_connections_are_reused(self):
+        connection = self.pool.acquire(FakeConnection, ping)
+        self.pool.release(connection)
+
+        self.assertIs(self.pool.acquire(FakeConnection, ping), connection)
+        self.assertEqual(self.pool.stats()['created'], 1)
+
+    def test_connections_of_exited_threads_are_reclaimed(self):
+        with self.assertLogs('django.db.backends', 'WARNING'):
+            leaked = [self.acquire_in_thread() for _ in range(3)]
+
+            for _ in range(3):
+                self.pool.acquire(FakeConnection, ping)
+
+        self.assertTrue(all(connection.closed for connection in leaked))
+        stats = self.pool.stats()
+        self.assertEqual((stats['size'], stats['reclaimed'], stats['timeouts']), (3, 3, 0))
+
+    def test_release_of_a_reclaimed_connection_is_ignored(self):
+        leaked = self.acquire_in_thread()
+        for _ in range(2):
+            self.pool.acquire(FakeConnection, ping)
+        with self.assertLogs('django.db.backends', 'WARNING'):
+            self.pool.acquire(FakeConnection, ping)
+
+        self.pool.release(leaked)
+
+        self.assertEqual(self.pool.stats()['size'], 3)
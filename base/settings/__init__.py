@@ -0,0 +1,23 @@
+"""
+Settings package. DJANGO_ENV (environment or .env) selects the profile:
+
+    dev    DEBUG on, MariaDB and SMTP from .env (default)
+    local  DEBUG on, SQLite file and console email, nothing else to run
+    test   in-memory SQLite, fast password hashing, emails kept in memory
+    prod   DEBUG off, persistent health checked database connections
+"""
+from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+
+DJANGO_ENV = config('DJANGO_ENV', default='dev')
+
+if DJANGO_ENV == 'dev':
+    from .dev import *
+elif DJANGO_ENV == 'local':
+    from .local import *
+elif DJANGO_ENV == 'test':
+    from .test import *
+elif DJANGO_ENV == 'prod':
+    from .prod import *
+else:
+    raise ImproperlyConfigured(f"Unknown DJANGO_ENV {DJANGO_ENV!r}, expected dev, local, test or prod.")
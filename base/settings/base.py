@@ -0,0 +1,238 @@
+"""
+Django settings for base project, shared by every profile of the base.settings package.
+
+Generated by 'django-admin startproject' using Django 5.1.5.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.1/ref/settings/
+"""
+
+from pathlib import Path
+import sys
+import tempfile
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(BASE_DIR / 'apps'))
+
+
+# SECRET_KEY, DATABASES and the SMTP credentials are set by each profile, see services.py
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = []
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'users', # Custom user app
+    'api',
+    'rest_framework',
+    'rest_framework.authtoken',
+]
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'api.authentication.ExpiringTokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'PAGE_SIZE': 20,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.SlidingWindowUserThrottle',
+        'api.throttling.SlidingWindowScopedThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '1000/h',  # Per user, or per IP for anonymous requests
+        'login': '20/m',  # /api-token-auth/
+    },
+}
+
+# In-process cache of token -> user used by CachedTokenAuthentication
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_TTL = 60  # Seconds, also how long other processes may see a stale user
+API_TOKEN_LIFETIME = 30 * 24 * 3600  # Seconds an API token from /api-token-auth/ stays valid
+
+BULK_USERS_CHUNK_SIZE = 1000  # Users validated and written per batch by /api/users/bulk/
+EXPORT_USERS_CHUNK_SIZE = 2000  # Users read per query by /api/users/export/ and export_users
+PASSWORD_HASHING_WORKERS = None  # Password hashing processes, None for one per CPU, 0 to hash inline
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'users.security.middleware.SessionTimeoutMiddleware',
+]
+
+SESSION_TIMEOUT = 1800
+# The session (and its cookie expiry) is saved only when it changes. SessionTimeoutMiddleware
+# refreshes `last_activity` at most once per SESSION_ACTIVITY_GRANULARITY seconds, and logs
+# idle users out up to that much after SESSION_TIMEOUT; the session must outlive that.
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_ACTIVITY_GRANULARITY = 60
+SESSION_COOKIE_AGE = SESSION_TIMEOUT + SESSION_ACTIVITY_GRANULARITY
+
+# Sessions are read from a cache shared by the worker processes and updates are written to the
+# database in batches, logins and logouts right away. See users/security/sessions.py
+SESSION_ENGINE = 'users.security.sessions'
+SESSION_CACHE_ALIAS = 'sessions'
+# Seconds a cached session is trusted. Logins and logouts are written through to the shared
+# cache, this only bounds how late a change made on another host is seen.
+SESSION_LOCAL_CACHE_TTL = 600
+SESSION_WRITE_BEHIND_INTERVAL = 1  # Seconds between batched session writes
+SESSION_WRITE_BEHIND_BATCH_SIZE = 500
+
+# tmpfs on Linux: files there never touch the disk
+SHARED_MEMORY_DIR = Path('/dev/shm') if Path('/dev/shm').is_dir() else Path(tempfile.gettempdir())
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        # In shared memory, so every worker process of the host sees a logout at once. The least
+        # recently used entries over MAX_ENTRIES are evicted, then read from the database again.
+        'BACKEND': 'base.cache.sqlite.SQLiteCache',
+        'LOCATION': str(SHARED_MEMORY_DIR / 'django-sessions.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'ratelimit': {
+        # Rate limit counters (users.security.ratelimit), in shared memory so every worker
+        # process of the host counts the same hits. Expired counters are culled first. With
+        # several hosts use Redis or Memcached; a per-process cache fails the users.E001 check.
+        'BACKEND': 'base.cache.sqlite.SQLiteCache',
+        'LOCATION': str(SHARED_MEMORY_DIR / 'django-ratelimit.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+RATELIMIT_CACHE_ALIAS = 'ratelimit'
+
+ROOT_URLCONF = 'base.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+            # Templates are read and parsed once per process, then rendered from memory.
+            # With DEBUG on, runserver's autoreloader clears the cache when a template changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+# Parse all users templates at startup (UsersConfig.ready) instead of on their first render
+TEMPLATES_WARMUP = True
+
+WSGI_APPLICATION = 'base.wsgi.application'
+
+#add a messages framework
+MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
+
+AUTH_USER_MODEL = 'users.User'
+
+# Checks passwords in the PASSWORD_HASHING_WORKERS process pool instead of the request thread
+AUTHENTICATION_BACKENDS = ['users.security.backends.PooledModelBackend']
+
+EMAIL_BACKEND = 'users.mail.backends.PooledSMTPEmailBackend'  # For production, reuses SMTP sessions
+# EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'  # One SMTP session per batch
+# EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For development
+
+# SMTP connection pool used by PooledSMTPEmailBackend
+SMTP_POOL_SIZE = 2  # Idle sessions kept open per process
+SMTP_POOL_IDLE_TIMEOUT = 60  # Seconds before an idle session is reopened
+SMTP_POOL_MAX_MESSAGES = 100  # Messages sent over one session before it is retired
+
+# Outbound mail queue, drained by `python manage.py send_queued_mail --loop`
+MAIL_QUEUE_BATCH_SIZE = 50  # Messages sent per SMTP session
+MAIL_QUEUE_MAX_ATTEMPTS = 5  # Give up on a message after this many failed sends
+MAIL_QUEUE_RETRY_BACKOFF = 60  # Seconds before the first retry, doubled on each failure
+MAIL_QUEUE_MAX_BACKOFF = 3600  # Upper bound for the retry delay
+MAIL_QUEUE_LEASE = 300  # Seconds a claimed message is hidden from other workers
+
+
+PASSWORD_RESET_TIMEOUT = 160
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+LOGIN_URL = '/login/'
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.1/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.1/howto/static-files/
+
+STATIC_URL = 'static/'
+
+# Directorio donde se guardarán los archivos media
+MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = '/media/'
+
+# Replaced profile images are deleted in the background, in batches, after the transaction commits
+PROFILE_IMAGE_REAPER_BATCH_SIZE = 100
+PROFILE_IMAGE_REAPER_INTERVAL = 2  # Seconds to wait for more deletions before running a batch
+
+# Profile pages: owner and owner sections cached per username, invalidated when the user changes
+PROFILE_CACHE_TIMEOUT = 300
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
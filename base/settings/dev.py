@@ -0,0 +1,11 @@
+"""
+Development: DEBUG on, against the MariaDB database and SMTP server configured in .env.
+"""
+from .base import *
+from .services import *
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+# runserver reloads often, templates are parsed on first use instead
+TEMPLATES_WARMUP = False
@@ -0,0 +1,28 @@
+"""
+Local development without MariaDB or SMTP: SQLite file, emails printed to the console.
+"""
+from decouple import config
+
+from .base import *
+
+DEBUG = True
+TEMPLATES_WARMUP = False
+
+SECRET_KEY = config('SECRET_KEY', default='django-insecure-local-only')
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+}
+
+# Same opt-in connection pool as with MariaDB, to try it out locally
+if config('DB_POOL', default=False, cast=bool):
+    DATABASES['default'].update({
+        'ENGINE': 'base.db.backends.sqlite3',
+        'POOL': {'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=4, cast=int)},
+    })
+
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'noreply@localhost'
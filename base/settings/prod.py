@@ -0,0 +1,20 @@
+"""
+Production: DEBUG off, persistent database connections, templates parsed at startup.
+"""
+from decouple import Csv, config
+
+from .base import *
+from .services import *
+
+DEBUG = False
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', cast=Csv())
+
+# Keep each worker's MariaDB connection open between requests instead of reconnecting
+# every time, and check it is still alive before reusing it after an idle period.
+DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=300, cast=int)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if 'POOL' in DATABASES['default']:
+    # With DB_POOL connections go back to the pool at the end of each request instead
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+TEMPLATES_WARMUP = True
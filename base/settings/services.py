@@ -0,0 +1,42 @@
+"""
+Secret key, MariaDB and SMTP credentials read from the environment (.env), used by the
+dev and prod profiles.
+"""
+from decouple import config
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = config('SECRET_KEY')
+
+# Database
+# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+
+#if we need to submit the DB in a server service use config:set 
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.mysql',
+        'NAME': config('DB_NAME'),
+        'USER': config('DB_USER'),
+        'PASSWORD': config('DB_PASSWORD'),
+        'HOST': config('DB_HOST', default='localhost'),
+        'PORT': config('DB_PORT', default='3307'),
+    }
+}
+
+# Opt-in connection pool shared by the threads of each process (base/db/pool.py)
+if config('DB_POOL', default=False, cast=bool):
+    DATABASES['default'].update({
+        'ENGINE': 'base.db.backends.mysql',
+        'POOL': {
+            'MIN_SIZE': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'TIMEOUT': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        },
+    })
+
+EMAIL_HOST = config('EMAIL_HOST')
+EMAIL_PORT = config('EMAIL_PORT', cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
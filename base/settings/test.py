@@ -0,0 +1,28 @@
+"""
+Test and benchmark runs: in-memory SQLite, no external service needed.
+"""
+from .base import *
+
+SECRET_KEY = 'django-insecure-test-only'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+# Emails end up in django.core.mail.outbox
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+DEFAULT_FROM_EMAIL = 'noreply@localhost'
+
+# PBKDF2 and starting hashing worker processes would dominate the run time
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+PASSWORD_HASHING_WORKERS = 0
+
+TEMPLATES_WARMUP = False
+MEDIA_ROOT = BASE_DIR / 'media' / 'test'
+
+# Apart from the caches of a server running on the same host
+CACHES['sessions'] = {**CACHES['sessions'], 'LOCATION': str(SHARED_MEMORY_DIR / 'django-sessions-test.sqlite3')}
+CACHES['ratelimit'] = {**CACHES['ratelimit'], 'LOCATION': str(SHARED_MEMORY_DIR / 'django-ratelimit-test.sqlite3')}
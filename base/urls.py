@@ -16,10 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from api.views import obtain_api_token
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Before users.urls, whose '<str:user_name>/' profile route would swallow it
+    path('api-token-auth/', obtain_api_token, name='api_token_auth'),
     path('', include('users.urls')),  # Include user-related URLs
     path('api/', include('api.urls')),
-    path('api-token-auth/', obtain_auth_token, name='api_token_auth'),
 ]
@@ -0,0 +1,69 @@
+"""
+Setup and reporting shared by the benchmark scripts. Run them from the repository root:
+
+    python benchmarks/<script>.py --help
+
+They default to the test profile (in-memory SQLite, fast hashing, nothing else to run);
+DJANGO_ENV=local runs them against db.sqlite3 instead.
+"""
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup(env='test'):
+    """
+    Configure Django for a standalone script, with the schema created when the database
+    is in memory.
+    """
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_ENV', env)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'base.settings')
+
+    import django
+    from django.conf import settings
+    if settings.DATABASES['default']['NAME'] == ':memory:':
+        # One database for every thread (request threads, sync_to_async), not one each.
+        # It lives as long as a connection to it is open, Django never closes those.
+        settings.DATABASES['default']['NAME'] = 'file:benchmarks?mode=memory&cache=shared'
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+    if connection.is_in_memory_db():
+        call_command('migrate', verbosity=0)
+
+
+def measure(function, repeat):
+    """
+    Seconds taken by each of `repeat` calls of function().
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summary(samples):
+    """
+    'median / p95 / max' of samples in seconds, formatted in milliseconds.
+    """
+    return (f'{statistics.median(samples) * 1000:9.3f} / {percentile(samples, 0.95) * 1000:9.3f} / '
+            f'{max(samples) * 1000:9.3f} ms')
+
+
+def print_table(header, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(header, *rows)]
+    for row in [header, *rows]:
+        print('  '.join(str(value).ljust(width) for value, width in zip(row, widths)))
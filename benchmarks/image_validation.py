@@ -0,0 +1,110 @@
+"""
+Time and peak memory of validate_profile_image (users.images.validators), which reads
+only the image header, against decoding the whole image, on valid, oversized,
+decompression bomb and malformed uploads.
+
+    python benchmarks/image_validation.py [--repeat 50]
+"""
+import argparse
+import ctypes
+import os
+from io import BytesIO
+
+from common import measure, print_table, setup, summary
+
+
+def encode(size, image_format, mode='RGB', noise=False):
+    from PIL import Image
+
+    if noise:
+        image = Image.frombytes(mode, size, os.urandom(size[0] * size[1] * len(mode)))
+    else:
+        image = Image.new(mode, size, 'white' if mode == 'RGB' else 0)
+    buffer = BytesIO()
+    image.save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def inputs():
+    png = encode((1024, 1024), 'PNG')
+    return {
+        'valid 1024x1024 PNG': png,
+        'valid 1024x1024 JPEG (noise)': encode((1024, 1024), 'JPEG', noise=True),
+        'oversized 4000x4000 PNG': encode((4000, 4000), 'PNG'),
+        # Compresses to a few KB, would take 400 MB once decoded
+        'bomb 20000x20000 PNG': encode((20000, 20000), 'PNG', mode='L'),
+        'truncated PNG': png[:len(png) // 2],
+        'not an image (1.5 MB)': os.urandom(1536 * 1024),
+    }
+
+
+def upload(data):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    return SimpleUploadedFile('image', data, content_type='application/octet-stream')
+
+
+def full_decode(image_file):
+    # What a naive validator does: decode every pixel before looking at the dimensions
+    from PIL import Image
+    try:
+        with Image.open(image_file) as image:
+            image.load()
+    except Exception:
+        pass
+
+
+def header_only(image_file):
+    from django.core.exceptions import ValidationError
+    from users.images.validators import validate_profile_image
+    try:
+        validate_profile_image(image_file)
+    except ValidationError:
+        pass
+
+
+def resident_kb(field):
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1])
+
+
+def peak_memory(function, data):
+    """
+    Growth of the peak resident memory while function() runs, in bytes. PIL decodes
+    outside of Python's allocator, tracemalloc would not see it. Linux (glibc) only: the peak
+    (VmHWM) is reset through /proc/self/clear_refs before the call.
+    """
+    image_file = upload(data)
+    # Give the memory freed by previous runs back to the system, or it would be reused unseen
+    ctypes.CDLL('libc.so.6').malloc_trim(0)
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5')
+    before = resident_kb('VmRSS')
+    function(image_file)
+    return (resident_kb('VmHWM') - before) * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    setup()
+
+    from PIL import Image
+    # A decode of the bomb is what is being measured, not refused
+    Image.MAX_IMAGE_PIXELS = None
+
+    rows = []
+    for name, data in inputs().items():
+        for label, function in [('header only', header_only), ('full decode', full_decode)]:
+            # Warm up: PIL registers its format plugins on first use
+            function(upload(data))
+            samples = measure(lambda: function(upload(data)), args.repeat)
+            rows.append([name, f'{len(data) // 1024} KB', label, summary(samples),
+                         f'{peak_memory(function, data) / 1024 / 1024:8.2f} MB'])
+    print_table(['input', 'size', 'validation', 'median / p95 / max', 'peak memory'], rows)
+
+
+if __name__ == '__main__':
+    main()
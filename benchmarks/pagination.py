@@ -0,0 +1,99 @@
+"""
+Latency of /api/users/ pages at increasing depths, page number pagination (COUNT(*) and
+OFFSET) against keyset pagination (?pagination=keyset, WHERE on the (date_joined, id)
+index), over a table of a million users.
+
+    python benchmarks/pagination.py [--users 1000000] [--repeat 20]
+"""
+import argparse
+from base64 import b64encode
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+from common import measure, print_table, setup, summary
+
+
+def create_users(count):
+    """
+    Insert count users with one raw executemany, date_joined one second apart.
+    """
+    from django.db import connection, transaction
+    from users.models import User
+
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    columns = ['password', 'is_superuser', 'username', 'first_name', 'last_name', 'is_staff',
+               'is_active', 'date_joined', 'email', 'is_verified', 'mails_count', 'updated_at']
+    rows = (
+        ('!', False, f'user{i}', 'First', 'Last', False, True, start + timedelta(seconds=i),
+         f'user{i}@example.com', True, 0, start)
+        for i in range(count)
+    )
+    sql = (f'INSERT INTO {User._meta.db_table} ({", ".join(columns)}) '
+           f'VALUES ({", ".join(["%s"] * len(columns))})')
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return start
+
+
+def keyset_cursor(date_joined):
+    # What UserKeysetPagination puts in its `next` links for a page starting after date_joined
+    return b64encode(urlencode({'p': str(date_joined)}).encode()).decode()
+
+
+def record_query(queries):
+    # Not CaptureQueriesContext: request_started resets the connection's query log
+    def wrapper(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from rest_framework.test import APIClient
+    from api.views import UserViewSet
+    from users.models import User
+
+    # The test client's host (testserver) is allowed
+    setup_test_environment()
+    print(f'Creating {args.users} users...')
+    start = create_users(args.users)
+    admin = User.objects.create_user('admin', 'admin@example.com', 'secret-pw-1', is_staff=True)
+    UserViewSet.throttle_classes = []
+    client = APIClient()
+    client.force_authenticate(admin)
+
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    pages = -(-User.objects.count() // page_size)
+    rows = []
+    for label, fraction in [('first', 0), ('middle', 0.5), ('last', 1)]:
+        page = max(1, round(pages * fraction))
+        offset = (page - 1) * page_size
+        cursor = keyset_cursor(start + timedelta(seconds=offset - 1)) if offset else None
+        urls = {
+            'page number': f'/api/users/?page={page}',
+            'keyset': f'/api/users/?cursor={cursor}' if cursor else '/api/users/?pagination=keyset',
+        }
+        for mode, url in urls.items():
+            response = client.get(url)
+            assert response.status_code == 200 and response.data['results'], (url, response.status_code)
+            queries = []
+            with connection.execute_wrapper(record_query(queries)):
+                client.get(url)
+            samples = measure(lambda: client.get(url), args.repeat)
+            rows.append([f'{label} (row {offset})', mode, len(queries), summary(samples)])
+    print_table(['page', 'pagination', 'queries', 'median / p95 / max'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Logins per second, per core, as the PBKDF2 iteration count changes: the password check
+of a login (users.security.hashing.acheck_password, what PooledModelBackend.aauthenticate
+awaits) run inline on the event loop and in the PASSWORD_HASHING_WORKERS process pool.
+The event loop lag column is the longest a concurrent request would have waited.
+
+    python benchmarks/password_hashing.py [--logins 64] [--concurrency 16]
+        [--iterations 100000,300000,600000,1000000] [--workers 0,<cpu count>]
+
+Runs with the local profile: the test profile only knows the MD5 hasher.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from common import print_table, setup
+
+
+async def event_loop_lag(stop, interval=0.005):
+    # Longest delay of a timer that should fire every `interval` seconds
+    lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(lag, time.perf_counter() - start - interval)
+    return lag
+
+
+async def run(encoded, logins, concurrency):
+    from users.security.hashing import acheck_password
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            is_correct, _ = await acheck_password('secret-pw-1', encoded)
+            assert is_correct
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(event_loop_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    seconds = time.perf_counter() - start
+    stop.set()
+    return seconds, await lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--iterations', default='100000,300000,600000,1000000')
+    parser.add_argument('--workers', default=f'0,{os.cpu_count()}')
+    args = parser.parse_args()
+    setup('local')
+
+    from django.conf import settings
+    from django.contrib.auth.hashers import PBKDF2PasswordHasher
+    from users.security import hashing
+
+    rows = []
+    for workers in map(int, args.workers.split(',')):
+        settings.PASSWORD_HASHING_WORKERS = workers
+        if workers:
+            # Start the pool outside of the measure
+            hashing.get_executor().submit(int).result()
+        for iterations in map(int, args.iterations.split(',')):
+            # Checking a hash runs the iteration count stored in it
+            encoded = PBKDF2PasswordHasher().encode('secret-pw-1', 'benchmarksalt', iterations)
+            seconds, lag = asyncio.run(run(encoded, args.logins, args.concurrency))
+            cores = min(workers, os.cpu_count()) or 1
+            rows.append([workers or 'inline', iterations, f'{args.logins / seconds:8.1f}',
+                         f'{args.logins / seconds / cores:8.1f}', f'{lag * 1000:8.1f} ms'])
+        if workers:
+            hashing.get_executor().shutdown()
+            hashing._executor = None
+    print_table(['workers', 'iterations', 'logins/s', 'logins/s/core', 'event loop lag'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+set() and get() latency of the shared session cache (base.cache.sqlite.SQLiteCache)
+against Django's FileBasedCache, both in shared memory, as the number of entries grows.
+FileBasedCache lists and stats every file to count its entries on each set().
+
+    python benchmarks/session_cache.py [--entries 1000,5000,9000] [--repeat 500]
+"""
+import argparse
+import shutil
+import tempfile
+
+from common import measure, print_table, setup, summary
+
+# What a logged-in session holds
+SESSION = {'_auth_user_id': '1', '_auth_user_backend': 'users.security.backends.PooledModelBackend',
+           '_auth_user_hash': 'f' * 64, 'last_activity': 1.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', default='1000,5000,9000')
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+    setup()
+
+    from django.conf import settings
+    from django.core.cache.backends.filebased import FileBasedCache
+    from base.cache.sqlite import SQLiteCache
+
+    rows = []
+    for entries in map(int, args.entries.split(',')):
+        directory = tempfile.mkdtemp(dir=settings.SHARED_MEMORY_DIR)
+        try:
+            backends = [
+                ('FileBasedCache', FileBasedCache(f'{directory}/files', {'OPTIONS': {'MAX_ENTRIES': 10000}})),
+                ('SQLiteCache', SQLiteCache(f'{directory}/cache.sqlite3', {'OPTIONS': {'MAX_ENTRIES': 10000}})),
+            ]
+            for name, cache in backends:
+                for i in range(entries):
+                    cache.set(f'session{i}', SESSION, 3600)
+                keys = iter(range(args.repeat * 2))
+                set_samples = measure(lambda: cache.set(f'session{next(keys)}', SESSION, 3600), args.repeat)
+                get_samples = measure(lambda: cache.get(f'session{next(keys)}'), args.repeat)
+                rows.append([name, entries, summary(set_samples), summary(get_samples)])
+        finally:
+            shutil.rmtree(directory)
+    print_table(['backend', 'entries', 'set median / p95 / max', 'get median / p95 / max'], rows)
+
+
+if __name__ == '__main__':
+    main()
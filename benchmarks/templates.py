@@ -0,0 +1,69 @@
+"""
+Parse time against render time of each page template: parsing (read from disk and
+compile, with the layout it extends) is what the cached loader and TEMPLATES_WARMUP do
+once per process instead of on every render; rendering is what every request pays.
+
+    python benchmarks/templates.py [--repeat 200]
+"""
+import argparse
+
+from common import measure, print_table, setup, summary
+
+
+def pages(alice):
+    """
+    (template, context) of every page, as the views in users/views.py render them.
+    """
+    from django.conf import settings
+    from users.cache import profile_version
+    from users.forms import Login_Form, Resend_Verification_Email_Form, Signup_Form, UserUpdateForm
+
+    return [
+        ('main.html', {'name': 'main'}),
+        ('login.html', {'form': Login_Form(), 'name': 'log in'}),
+        ('signup.html', {'form': Signup_Form(), 'name': 'sign up'}),
+        ('resend_verification.html', {'form': Resend_Verification_Email_Form(), 'name': 'resend email'}),
+        ('update_user.html', {'form': UserUpdateForm(instance=alice), 'name': 'update'}),
+        ('profile.html', {
+            'user_owner': alice, 'user_viewer': alice, 'name': alice.username,
+            'profile_version': profile_version(alice.username),
+            'profile_cache_timeout': getattr(settings, 'PROFILE_CACHE_TIMEOUT', 300),
+        }),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    setup()
+
+    from django.template import engines
+    from django.test import RequestFactory
+    from users.models import User
+
+    alice = User.objects.create_user('alice', 'alice@example.com', 'secret-pw-1', first_name='Alice')
+    request = RequestFactory().get('/')
+    request.user = alice
+    backend = engines['django']
+    loader = backend.engine.template_loaders[0]
+
+    def parse(name):
+        # Empty the cached loader, then load the page and the layout it extends
+        loader.reset()
+        backend.get_template(name)
+        backend.get_template('layout/nav.html')
+
+    rows = []
+    for name, context in pages(alice):
+        parse_samples = measure(lambda: parse(name), args.repeat)
+        template = backend.get_template(name)
+        # Once, so that the layout is in the cached loader and profile.html's fragments in the cache
+        template.render(context, request)
+        render_samples = measure(lambda: template.render(context, request), args.repeat)
+        rows.append([name, summary(parse_samples), summary(render_samples)])
+    print_table(['template', 'parse median / p95 / max', 'render median / p95 / max'], rows)
+
+
+if __name__ == '__main__':
+    main()
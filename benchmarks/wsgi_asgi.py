@@ -0,0 +1,137 @@
+"""
+Load test of the site under WSGI and ASGI: requests per second and latency percentiles
+of the main, login and profile pages, with `--concurrency` requests in flight.
+
+Django's WSGI and ASGI handlers are driven in process, the way a threaded WSGI server
+(gunicorn --threads, one thread per request) and an ASGI server (uvicorn, one event
+loop) call them. No server is needed and none is measured: the difference shown is the
+sync and async request paths of Django and of the views (sync_to_async hops, async_to_sync
+for async views under WSGI).
+
+    python benchmarks/wsgi_asgi.py [--requests 2000] [--concurrency 1,8,32]
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from common import percentile, print_table, setup
+
+PAGES = ['/', '/login/', '/alice/']
+
+
+def wsgi_get(application, path, cookie):
+    environ = {'PATH_INFO': path, 'REQUEST_METHOD': 'GET', 'HTTP_COOKIE': cookie}
+    setup_testing_defaults(environ)
+    statuses = []
+    body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    for _ in body:
+        pass
+    # Sends request_finished, like a server does
+    body.close()
+    return int(statuses[0].split()[0])
+
+
+async def asgi_get(application, path, cookie):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+        'root_path': '', 'headers': [(b'host', b'127.0.0.1'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('127.0.0.1', 80),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    statuses = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client never disconnects, Django cancels this wait once the response is sent
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+def run_wsgi(requests, concurrency, cookie):
+    from django.core.wsgi import get_wsgi_application
+    application = get_wsgi_application()
+    latencies = []
+    lock = threading.Lock()
+    paths = iter(PAGES[i % len(PAGES)] for i in range(requests))
+
+    def client():
+        while True:
+            with lock:
+                path = next(paths, None)
+            if path is None:
+                return
+            start = time.perf_counter()
+            assert wsgi_get(application, path, cookie) == 200, path
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for future in [executor.submit(client) for _ in range(concurrency)]:
+            future.result()
+    return time.perf_counter() - start, latencies
+
+
+def run_asgi(requests, concurrency, cookie):
+    from django.core.asgi import get_asgi_application
+    application = get_asgi_application()
+    latencies = []
+    paths = iter(PAGES[i % len(PAGES)] for i in range(requests))
+
+    async def client():
+        for path in paths:
+            start = time.perf_counter()
+            assert await asgi_get(application, path, cookie) == 200, path
+            latencies.append(time.perf_counter() - start)
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', default='1,8,32')
+    args = parser.parse_args()
+    setup()
+
+    from django.conf import settings
+    from django.test import Client
+    from users.models import User
+
+    # wsgiref's default host
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, '127.0.0.1']
+    alice = User.objects.create_user('alice', 'alice@example.com', 'secret-pw-1', is_verified=True)
+    client = Client()
+    client.force_login(alice)
+    cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+    rows = []
+    for concurrency in map(int, args.concurrency.split(',')):
+        for name, run in [('WSGI', run_wsgi), ('ASGI', run_asgi)]:
+            # Warm up: imports, template and URL resolver caches
+            run(len(PAGES), 1, cookie)
+            seconds, latencies = run(args.requests, concurrency, cookie)
+            rows.append([name, concurrency, f'{len(latencies) / seconds:8.1f}'] + [
+                f'{percentile(latencies, fraction) * 1000:8.2f}' for fraction in (0.5, 0.95, 0.99)
+            ])
+    print_table(['handler', 'concurrency', 'requests/s', 'p50 ms', 'p95 ms', 'p99 ms'], rows)
+
+
+if __name__ == '__main__':
+    main()